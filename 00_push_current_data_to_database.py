@@ -3,11 +3,17 @@ from typing import List
 from dotenv import load_dotenv
 from argparse import ArgumentParser
 from dao.google_bigquery import GoogleBigQuery
-from credential_accessor import CredentialAccessor
+from client_registry import get_big_query
 from commons.sqlite.connect import connect_to_sqlite
 from commons.checkpoint.google_cloud_console import GoogleCloudStorage
-from commons.preprocessing.context_enrichment import structurize_context_enrichment_data, get_product_recommendation
+from commons.preprocessing.context_enrichment import structurize_context_enrichment_data, get_product_recommendation, get_purchase_probability, DEFAULT_TOP_K
 from commons.preprocessing.import_data import get_context_enrichment_data, get_detail_mitra, get_product_candidates, get_product_substitutes
+from commons.preprocessing.import_data import get_smrm_data, get_gmv_data, get_purchase_prob_data
+from commons.preprocessing.purchase_prob import PURCHASE_PROB_METHODS
+from commons.preprocessing.product_dictionary import get_product_dictionary
+from commons.preprocessing.acquisition import TaskGraph, run_task_graph
+from commons.preprocessing.chunked_ingestion import ingest_context_enrichment_data, PartitionStore
+from commons.preprocessing.region_sharding import get_product_recommendation_by_region
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -18,6 +24,13 @@ if __name__ == "__main__":
     parser.add_argument('-E', '--env', dest="env", type=str, required=True, help="Working environment.", choices=["dev", "prod"])
     parser.add_argument('-S', '--onserver', dest="onserver", action="store_true", help="Server availability.")
     parser.add_argument('-b', '--bucket', dest="bucket", type=str, required=True, help="Name of bucket")
+    parser.add_argument('--create-bucket', dest="create_bucket", action="store_true", help="Create the bucket if it doesn't exist.")
+    parser.add_argument('-w', '--workers', dest="workers", type=int, default=8, help="Number of concurrent dataset acquisitions")
+    parser.add_argument('-m', '--memory-cap', dest="memory_cap", type=int, default=None, help="Memory cap (in MB) of context enrichment data, ingested in chunks if specified")
+    parser.add_argument('-k', '--top-k', dest="top_k", type=int, default=DEFAULT_TOP_K, help="Number of recommended products per mitra")
+    parser.add_argument('-r', '--regions', dest="regions", type=str, default=None, help="Comma-separated regions to preprocess, each in its own process, all regions if not specified")
+    parser.add_argument('-p', '--processes', dest="processes", type=int, default=None, help="Number of processes of region-sharded preprocessing, preprocessed in a single process if neither this nor regions is specified")
+    parser.add_argument('--purchase-prob-method', dest="purchase_prob_method", type=str, default="closed_form", help="Estimator of purchase probability", choices=PURCHASE_PROB_METHODS)
     
     args = vars(parser.parse_args())
 
@@ -25,9 +38,14 @@ if __name__ == "__main__":
     ENV = args["env"]
     ON_SERVER = args["onserver"]
     BUCKET_NAME = args["bucket"]
+    NUM_WORKERS = args["workers"]
+    MEMORY_CAP = args["memory_cap"]
+    TOP_K = args["top_k"]
+    REGIONS = [region.strip() for region in args["regions"].split(",")] if args["regions"] else None
+    NUM_PROCESSES = args["processes"]
+    PURCHASE_PROB_METHOD = args["purchase_prob_method"]
     
-    cr_acc: CredentialAccessor = CredentialAccessor(env=ENV, on_server=ON_SERVER)
-    big_query: GoogleBigQuery = GoogleBigQuery(cr_acc.get_attr())
+    big_query: GoogleBigQuery = get_big_query(env=ENV, on_server=ON_SERVER)
 
     gcs: GoogleCloudStorage = GoogleCloudStorage(
         bucket_name=BUCKET_NAME,
@@ -35,22 +53,88 @@ if __name__ == "__main__":
         on_server=ON_SERVER
     )
 
-    # TODO: 1. Import Data
-    context_enrichment_data: pd.DataFrame = get_context_enrichment_data(gcs=gcs)
-    data: dict = structurize_context_enrichment_data(context_enrichment_data=context_enrichment_data)
-
-    # TODO: 2. Data Preprocessing
-    detail_mitra: pd.DataFrame = get_detail_mitra(gcs=gcs) # detail mitra
-    product_recommendation: pd.DataFrame = get_product_recommendation(product_recommendation=data["product_recom"]["rekomendasi_produk"], detail_mitra=detail_mitra[["mitra_id", "region_mitra"]], gcs=gcs) # product recommendation
-    product_substitution: pd.DataFrame = get_product_substitutes(gcs=gcs) # product substitution
-    product_candidates: pd.DataFrame = get_product_candidates(gcs=gcs) # product candidates
-
-    # TODO: 3. Connect to SQLite Database
-    data: dict = {
-        "detail_mitra": detail_mitra,
-        "rekomendasi_produk": product_recommendation,
-        "substitusi_produk": product_substitution,
-        "kandidat_produk": product_candidates
+    if args["create_bucket"]:
+        gcs.create_bucket()
+
+    # TODO: 1. Import Data, and 2. Data Preprocessing
+    # Every dataset is acquired concurrently, preprocessing starts as soon as its inputs arrive
+    tasks: TaskGraph = {
+        "context_enrichment_data": (lambda: get_context_enrichment_data(gcs=gcs), []),
+        "detail_mitra": (lambda: get_detail_mitra(gcs=gcs), []), # detail mitra
+        "smrm_data": (lambda detail_mitra: get_smrm_data(gcs=gcs, mitra_ids=detail_mitra["mitra_id"]), ["detail_mitra"]),
+        "gmv_data": (lambda: get_gmv_data(gcs=gcs), []),
+        "product_substitution": (lambda: get_product_substitutes(gcs=gcs), []), # product substitution
+        "product_candidates": (lambda: get_product_candidates(gcs=gcs), []), # product candidates
+        "purchase_prob_data": (lambda: get_purchase_prob_data(gcs=gcs), []),
+        "structured_data": (
+            lambda context_enrichment_data: structurize_context_enrichment_data(context_enrichment_data=context_enrichment_data),
+            ["context_enrichment_data"]
+        ),
+        "product_recommendation": ( # product recommendation
+            lambda structured_data, detail_mitra, smrm_data, gmv_data: get_product_recommendation(
+                product_recommendation=structured_data["product_recom"]["rekomendasi_produk"],
+                detail_mitra=detail_mitra[["mitra_id", "region_mitra"]],
+                gcs=gcs,
+                smrm_data=smrm_data,
+                gmv_data=gmv_data,
+                top_k=TOP_K
+            ),
+            ["structured_data", "detail_mitra", "smrm_data", "gmv_data"]
+        ),
+        "purchase_probability": ( # purchase probability
+            lambda purchase_prob_data: get_purchase_probability(
+                gcs=gcs,
+                transactions=purchase_prob_data,
+                method=PURCHASE_PROB_METHOD,
+                max_workers=NUM_PROCESSES
+            ),
+            ["purchase_prob_data"]
+        )
     }
+
+    if REGIONS is not None or NUM_PROCESSES is not None:
+        # Shard product recommendation by region of mitra across a process pool
+        tasks["product_recommendation"] = (
+            lambda structured_data, detail_mitra, smrm_data, gmv_data: get_product_recommendation_by_region(
+                product_recommendation=structured_data["product_recom"]["rekomendasi_produk"],
+                detail_mitra=detail_mitra[["mitra_id", "region_mitra"]],
+                gcs=gcs,
+                smrm_data=smrm_data,
+                gmv_data=gmv_data,
+                top_k=TOP_K,
+                regions=REGIONS,
+                max_workers=NUM_PROCESSES
+            ),
+            ["structured_data", "detail_mitra", "smrm_data", "gmv_data"]
+        )
+
+    if MEMORY_CAP is not None:
+        # Read the snapshot in bounded batches, straight into per-category partitions
+        del tasks["context_enrichment_data"]
+        tasks["structured_data"] = (lambda: ingest_context_enrichment_data(gcs=gcs, memory_cap_bytes=MEMORY_CAP * 1024 ** 2), [])
+
+    results: dict = run_task_graph(tasks, max_workers=NUM_WORKERS)
+    try:
+        detail_mitra: pd.DataFrame = results["detail_mitra"]
+        product_recommendation: pd.DataFrame = results["product_recommendation"]
+        product_substitution: pd.DataFrame = results["product_substitution"]
+        product_candidates: pd.DataFrame = results["product_candidates"]
+        purchase_probability: pd.DataFrame = results["purchase_probability"]
+
+        # TODO: 3. Connect to SQLite Database
+        # Product ids of every table refer to `produk`
+        data: dict = {
+            "produk": get_product_dictionary(gcs).to_frame(),
+            "detail_mitra": detail_mitra,
+            "rekomendasi_produk": product_recommendation,
+            "substitusi_produk": product_substitution,
+            "kandidat_produk": product_candidates,
+            "probabilitas_pembelian": purchase_probability
+        }
     
-    db = connect_to_sqlite(data, gcs_obj=gcs)
\ No newline at end of file
+        db = connect_to_sqlite(data, gcs_obj=gcs)
+
+    finally:
+        # Spilled partitions of chunked ingestion aren't needed anymore
+        if isinstance(results["structured_data"], PartitionStore):
+            results["structured_data"].close()
@@ -11,10 +11,11 @@ from google.generativeai.types.generation_types import StopCandidateException
 from langchain.chains import create_sql_query_chain
 from langchain_community.tools.sql_database.tool import QuerySQLDataBaseTool
 from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.preprocessing.import_data import get_detail_mitra
 from typing import List
 from datetime import datetime
 from dao.google_bigquery import GoogleBigQuery
-from credential_accessor import CredentialAccessor
+from client_registry import get_big_query
 import pandas as pd
 import json
 
@@ -41,8 +42,7 @@ if __name__ == "__main__":
     BQ_TABLE_NAME = "mp_bi.mp_bi_fact_context_enrichment_product_summary"
 
     # Initialize Google Big Query and Google Cloud Storage
-    cr_acc: CredentialAccessor = CredentialAccessor(env=ENV, on_server=ON_SERVER)
-    big_query: GoogleBigQuery = GoogleBigQuery(cr_acc.get_attr())
+    big_query: GoogleBigQuery = get_big_query(env=ENV, on_server=ON_SERVER)
     gcs: GoogleCloudStorage = GoogleCloudStorage(bucket_name=BUCKET_NAME, env=ENV, on_server=ON_SERVER)
 
     # Initialize SQLAlchemy Engine
@@ -71,8 +71,7 @@ if __name__ == "__main__":
     )
 
     # Obtain `detail_mitra` data
-    detail_mitra_gsutil_uri: str = f"gs://{BUCKET_NAME}/datasets/detail_mitra.csv"
-    detail_mitra: pd.DataFrame = pd.read_csv(detail_mitra_gsutil_uri)
+    detail_mitra: pd.DataFrame = get_detail_mitra(gcs=gcs)
 
     # Preserve some columns to be able to be processed
     columns_to_preserved: List[str] = ["mitra_id", "nama_mitra", "region_mitra"]
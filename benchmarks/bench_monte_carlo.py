@@ -0,0 +1,114 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import List
+from argparse import ArgumentParser
+from commons.preprocessing.purchase_prob import special_monte_carlo_simulation
+
+def legacy_special_monte_carlo_simulation(
+    time_series_data: pd.Series,
+    n_size: int,
+    n_simulation: int,
+    param_scale: float = 1
+) -> List[float]:
+    """
+    Previous implementation of `special_monte_carlo_simulation` (one Python iteration per simulation), kept as benchmark baseline
+
+    Parameters
+    ----------
+        time_series_data: pd.Series
+            specified time-series data
+
+        n_size: int
+            number of sample size
+
+        n_simulation: int
+            number of simulation
+
+        param_scale: float
+            The scale parameter. Must be non-negative
+
+    Returns
+    ----------
+        mean_samples: List[float]
+            samples generated from 'Special' Monte Carlo Simulation
+    """
+    mean_samples: List[float] = []
+
+    for _ in range(n_simulation):
+        random_samples: np.ndarray = np.random.exponential(scale=param_scale, size=n_size)
+
+        min_max_scaling = lambda x: (x - random_samples.min()) / (random_samples.max() - random_samples.min())
+        standardized_samples: np.ndarray = np.vectorize(min_max_scaling)(random_samples)
+
+        standardized_samples: np.ndarray = np.floor(standardized_samples * (n_size - 1)) + 1
+        standardized_samples = standardized_samples.astype(int)
+
+        converted_samples: List[float] = [time_series_data.iloc[-num_loc] for num_loc in standardized_samples]
+
+        mean_sample: float = np.random.normal(
+            loc=np.mean(converted_samples),
+            scale=np.std(converted_samples)
+        )
+
+        mean_samples.append(mean_sample)
+
+    return mean_samples
+
+def generate_time_series(
+    n_size: int,
+    purchase_rate: float = 0.3,
+    seed: int = 0
+) -> pd.Series:
+    """
+    Generate synthetic weekly purchase quantities, mostly zeros
+
+    Parameters
+    ----------
+        n_size: int
+            number of weeks
+
+        purchase_rate: float
+            probability of a purchase in a week
+
+        seed: int
+            random seed
+
+    Returns
+    ----------
+        time_series_data: pd.Series
+            synthetic weekly quantities
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    quantities: np.ndarray = rng.poisson(5, size=n_size) * (rng.random(n_size) < purchase_rate)
+    return pd.Series(quantities.astype(float), index=pd.date_range("2024-01-07", periods=n_size, freq="W"))
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser()
+    parser.add_argument('-n', '--n-size', dest="n_size", type=int, default=52, help="Number of weeks of synthetic time series")
+    parser.add_argument('-s', '--n-simulation', dest="n_simulation", type=int, default=10_000, help="Number of simulations")
+    parser.add_argument('--seed', dest="seed", type=int, default=0, help="Random seed")
+
+    args = vars(parser.parse_args())
+
+    time_series_data: pd.Series = generate_time_series(args["n_size"], seed=args["seed"])
+    np.random.seed(args["seed"])
+
+    start_time: float = time.perf_counter()
+    legacy_samples: np.ndarray = np.array(legacy_special_monte_carlo_simulation(time_series_data, args["n_size"], args["n_simulation"]))
+    legacy_time: float = time.perf_counter() - start_time
+
+    start_time: float = time.perf_counter()
+    samples: np.ndarray = special_monte_carlo_simulation(time_series_data, args["n_size"], args["n_simulation"], rng=np.random.default_rng(args["seed"]))
+    vectorized_time: float = time.perf_counter() - start_time
+
+    # Both implementations draw from the same distribution, so their purchase probabilities agree within sampling error
+    legacy_prob: float = np.mean(legacy_samples > 0)
+    prob: float = np.mean(samples > 0)
+    standard_error: float = np.sqrt(2 * prob * (1 - prob) / args["n_simulation"])
+
+    print(f"purchase prob : legacy {legacy_prob:.4f}, vectorized {prob:.4f} (difference {abs(legacy_prob - prob):.4f}, standard error {standard_error:.4f})")
+    print(f"sample mean   : legacy {legacy_samples.mean():.4f}, vectorized {samples.mean():.4f}")
+    print(f"legacy_special_monte_carlo_simulation : {legacy_time:.3f}s")
+    print(f"special_monte_carlo_simulation        : {vectorized_time:.3f}s ({legacy_time / vectorized_time:.0f}x)")
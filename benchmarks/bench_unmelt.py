@@ -0,0 +1,127 @@
+import time
+import numpy as np
+import pandas as pd
+from typing import List, Union
+from argparse import ArgumentParser
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.preprocessing.import_data import get_context_enrichment_data
+from commons.preprocessing.context_enrichment import structurize_context_enrichment_data, unmelt_context_enrichment
+
+def legacy_modify_data(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Previous implementation of `modify_data` (split into lists, pivot, then explode), kept as benchmark baseline
+
+    Parameters
+    ----------
+        data: pd.DataFrame
+            specified data
+
+    Returns
+    ----------
+        modified_data: pd.DataFrame
+            modified data
+    """
+    def unmelt_df(
+        melted_df: pd.DataFrame,
+        index: Union[str, List[str]],
+        columns: Union[str, List[str]]
+    ) -> pd.DataFrame:
+        unmelted_df: pd.DataFrame = melted_df.pivot(index=index, columns=columns)
+        unmelted_df = unmelted_df['value'].reset_index()
+        unmelted_df.columns.name = None
+        return unmelted_df
+
+    data = data.copy()
+    data["value"] = data["value"].str.split(" ; ")
+    data = data.drop_duplicates(subset=["mitra_id", "metric_name"])
+
+    data = unmelt_df(data, index=["mitra_id", "snapshot_dt"], columns=["metric_name"])
+    columns_to_explode: List[str] = data.columns.tolist()[2:]
+    data = data.explode(columns_to_explode).reset_index(drop=True)
+
+    return data
+
+def generate_snapshot(
+    num_mitra: int,
+    num_products: int,
+    num_metrics: int,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate synthetic `product_recom/rekomendasi_produk` snapshot in the long, delimited format
+
+    Parameters
+    ----------
+        num_mitra: int
+            number of mitra
+
+        num_products: int
+            maximum number of recommended products per mitra
+
+        num_metrics: int
+            number of metrics per mitra
+
+        seed: int
+            random seed
+
+    Returns
+    ----------
+        snapshot: pd.DataFrame
+            synthetic snapshot
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    product_counts: np.ndarray = rng.integers(1, num_products + 1, size=num_mitra)
+
+    rows: List[dict] = [
+        {
+            "mitra_id": mitra_id,
+            "snapshot_dt": pd.Timestamp("2024-01-01"),
+            "metric_name": "nama_produk" if metric == 0 else f"metric_{metric}",
+            "value": " ; ".join(f"PRODUK {rng.integers(0, 5000)}" for _ in range(product_counts[mitra_id]))
+        }
+        for mitra_id in range(num_mitra)
+        for metric in range(num_metrics)
+    ]
+
+    return pd.DataFrame(rows)
+
+def time_function(function, data: pd.DataFrame, repeat: int) -> float:
+    """
+    Obtain best running time of a function over `repeat` runs, in seconds
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start_time: float = time.perf_counter()
+        function(data.copy())
+        timings.append(time.perf_counter() - start_time)
+
+    return min(timings)
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser()
+    parser.add_argument('-E', '--env', dest="env", type=str, default="dev", help="Working environment.", choices=["dev", "prod"])
+    parser.add_argument('-S', '--onserver', dest="onserver", action="store_true", help="Server availability.")
+    parser.add_argument('-b', '--bucket', dest="bucket", type=str, default=None, help="Name of bucket, today's snapshot is used if specified")
+    parser.add_argument('-n', '--num-mitra', dest="num_mitra", type=int, default=50_000, help="Number of mitra of synthetic snapshot")
+    parser.add_argument('-r', '--repeat', dest="repeat", type=int, default=3, help="Number of runs per implementation")
+
+    args = vars(parser.parse_args())
+
+    if args["bucket"] is not None:
+        gcs: GoogleCloudStorage = GoogleCloudStorage(bucket_name=args["bucket"], env=args["env"], on_server=args["onserver"])
+        data: pd.DataFrame = structurize_context_enrichment_data(get_context_enrichment_data(gcs=gcs))["product_recom"]["rekomendasi_produk"]
+    else:
+        data: pd.DataFrame = generate_snapshot(num_mitra=args["num_mitra"], num_products=5, num_metrics=4)
+
+    # Both implementations must produce the same table
+    expected: pd.DataFrame = legacy_modify_data(data)
+    result: pd.DataFrame = unmelt_context_enrichment(data.copy())
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    legacy_time: float = time_function(legacy_modify_data, data, args["repeat"])
+    unmelt_time: float = time_function(unmelt_context_enrichment, data, args["repeat"])
+
+    print(f"Rows: {len(data)} -> {len(result)}")
+    print(f"legacy_modify_data        : {legacy_time:.3f}s")
+    print(f"unmelt_context_enrichment : {unmelt_time:.3f}s ({legacy_time / unmelt_time:.1f}x)")
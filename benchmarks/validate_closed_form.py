@@ -0,0 +1,86 @@
+import time
+import numpy as np
+import pandas as pd
+from argparse import ArgumentParser
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.preprocessing.import_data import get_purchase_prob_data
+from commons.preprocessing.purchase_prob import calculate_purchase_probs
+
+def generate_transactions(
+    num_series: int,
+    seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generate synthetic long-format transactions, with sparse and dense buyers
+
+    Parameters
+    ----------
+        num_series: int
+            number of (mitra, product) series
+
+        seed: int
+            random seed
+
+    Returns
+    ----------
+        transactions: pd.DataFrame
+            columns `mitra_id`, `nama_produk`, `trx_date`, and `num_orders`, like `get_purchase_prob_data`
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    today: pd.Timestamp = pd.Timestamp.today().normalize()
+
+    num_transactions: np.ndarray = rng.integers(1, 40, size=num_series)
+    series_ids: np.ndarray = np.repeat(np.arange(num_series), num_transactions)
+    history_days: np.ndarray = rng.choice([60, 180, 365, 730], size=num_series)[series_ids]
+
+    return pd.DataFrame({
+        "mitra_id": series_ids // 3,
+        "nama_produk": ["PRODUK {}".format(series_id % 3) for series_id in series_ids],
+        "trx_date": today - pd.to_timedelta((rng.random(len(series_ids)) * history_days).astype(int), unit="D"),
+        "num_orders": rng.poisson(4, size=len(series_ids)) + 1
+    })
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser()
+    parser.add_argument('-E', '--env', dest="env", type=str, default="dev", help="Working environment.", choices=["dev", "prod"])
+    parser.add_argument('-S', '--onserver', dest="onserver", action="store_true", help="Server availability.")
+    parser.add_argument('-b', '--bucket', dest="bucket", type=str, default=None, help="Name of bucket, today's transactions are used if specified")
+    parser.add_argument('-n', '--num-series', dest="num_series", type=int, default=2_000, help="Number of series to compare")
+    parser.add_argument('-s', '--n-simulation', dest="n_simulation", type=int, default=20_000, help="Number of simulations per series")
+    parser.add_argument('-f', '--freq', dest="freq", type=str, default="W", help="Frequency of time series")
+    parser.add_argument('--seed', dest="seed", type=int, default=0, help="Random seed")
+
+    args = vars(parser.parse_args())
+    key_columns = ["mitra_id", "nama_produk"]
+
+    if args["bucket"] is not None:
+        gcs: GoogleCloudStorage = GoogleCloudStorage(bucket_name=args["bucket"], env=args["env"], on_server=args["onserver"])
+        transactions: pd.DataFrame = get_purchase_prob_data(gcs=gcs)
+
+        # Compare on a random subset of series
+        series_keys: pd.DataFrame = transactions[key_columns].drop_duplicates()
+        series_keys = series_keys.sample(n=min(args["num_series"], len(series_keys)), random_state=args["seed"])
+        transactions = transactions.merge(series_keys, on=key_columns)
+    else:
+        transactions: pd.DataFrame = generate_transactions(args["num_series"], seed=args["seed"])
+
+    probs_args: dict = dict(transactions=transactions, key_columns=key_columns, date_col="trx_date", column_to_observe="num_orders", freq=args["freq"], n_simulation=args["n_simulation"], seed=args["seed"])
+
+    start_time: float = time.perf_counter()
+    simulated: pd.DataFrame = calculate_purchase_probs(method="simulation", **probs_args)
+    simulation_time: float = time.perf_counter() - start_time
+
+    start_time: float = time.perf_counter()
+    closed_form: pd.DataFrame = calculate_purchase_probs(method="closed_form", **probs_args)
+    closed_form_time: float = time.perf_counter() - start_time
+
+    # Simulation itself is off by its sampling error, which bounds how close the estimators can look
+    errors: np.ndarray = np.abs(closed_form["purchase_prob"] - simulated["purchase_prob"]).to_numpy()
+    sampling_errors: np.ndarray = np.sqrt(simulated["purchase_prob"] * (1 - simulated["purchase_prob"]) / args["n_simulation"]).to_numpy()
+
+    print(f"Series: {len(simulated)}")
+    print(f"absolute error : mean {np.nanmean(errors):.4f}, p90 {np.nanquantile(errors, 0.9):.4f}, max {np.nanmax(errors):.4f}")
+    print(f"within 3 standard errors of simulation : {np.nanmean(errors <= 3 * sampling_errors + 1e-3):.1%}")
+    print(f"simulation  : {simulation_time:.3f}s")
+    print(f"closed form : {closed_form_time:.3f}s ({simulation_time / closed_form_time:.0f}x)")
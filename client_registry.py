@@ -0,0 +1,148 @@
+import threading
+from google.cloud import storage as st, bigquery as bq
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+from credential_accessor import CredentialAccessor
+from dao.google_bigquery import GoogleBigQuery
+
+# Size of HTTP connection pool, shared by all clients of the same (env, on_server)
+HTTP_POOL_SIZE = 32
+
+# OAuth scopes of the shared HTTP session, clients given their own session don't apply their default scopes
+GOOGLE_CLOUD_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+_registry = {}
+_lock = threading.RLock()
+
+def _get_or_create(
+    key : tuple,
+    factory,
+    *args, **kwargs
+):
+    """
+        Usage:
+        To get a registered object, or create and register it once.
+
+        Arguments:
+        . key -> registry key, including kind of object, env, and on_server
+        . factory -> function to create the object
+    """
+
+    with _lock:
+        if key not in _registry:
+            _registry[key] = factory()
+
+        return _registry[key]
+
+def get_credential_accessor(
+    env : str = "dev",
+    on_server : bool = False,
+    *args, **kwargs
+) -> CredentialAccessor:
+    """
+        Usage:
+        To get the shared CredentialAccessor, config.yaml and the key file are read once per (env, on_server).
+
+        Arguments:
+        . env -> working environment options, "dev" (development) or "prod" (production)
+        . on_server -> whether the access is in local or AWS server
+    """
+
+    return _get_or_create(
+        ("credential_accessor", env, on_server),
+        lambda: CredentialAccessor(env=env, on_server=on_server)
+    )
+
+def get_http_session(
+    env : str = "dev",
+    on_server : bool = False,
+    *args, **kwargs
+) -> AuthorizedSession:
+    """
+        Usage:
+        To get the shared authorized HTTP session with a pooled connection adapter.
+        Service account credentials are scoped to Google Cloud Platform, since they are loaded without any scope.
+
+        Arguments:
+        . env -> working environment options, "dev" (development) or "prod" (production)
+        . on_server -> whether the access is in local or AWS server
+    """
+
+    def create_session():
+        credentials = get_credential_accessor(env, on_server).google_auth_sa_credentials.with_scopes(GOOGLE_CLOUD_SCOPES)
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        return session
+
+    return _get_or_create(("http_session", env, on_server), create_session)
+
+def get_gbq_client(
+    env : str = "dev",
+    on_server : bool = False,
+    *args, **kwargs
+) -> bq.client.Client:
+    """
+        Usage:
+        To get the shared Google BigQuery client.
+
+        Arguments:
+        . env -> working environment options, "dev" (development) or "prod" (production)
+        . on_server -> whether the access is in local or AWS server
+    """
+
+    def create_client():
+        attr = get_credential_accessor(env, on_server).get_attr()
+        return bq.Client(
+            project=attr["project_id"],
+            credentials=attr["cred_sa"],
+            _http=get_http_session(env, on_server)
+        )
+
+    return _get_or_create(("gbq_client", env, on_server), create_client)
+
+def get_gcs_client(
+    env : str = "dev",
+    on_server : bool = False,
+    *args, **kwargs
+) -> st.client.Client:
+    """
+        Usage:
+        To get the shared Google Cloud Storage client.
+
+        Arguments:
+        . env -> working environment options, "dev" (development) or "prod" (production)
+        . on_server -> whether the access is in local or AWS server
+    """
+
+    def create_client():
+        attr = get_credential_accessor(env, on_server).get_attr()
+        return st.Client(
+            project=attr["project_id"],
+            credentials=attr["cred_sa"],
+            _http=get_http_session(env, on_server)
+        )
+
+    return _get_or_create(("gcs_client", env, on_server), create_client)
+
+def get_big_query(
+    env : str = "dev",
+    on_server : bool = False,
+    *args, **kwargs
+) -> GoogleBigQuery:
+    """
+        Usage:
+        To get the shared GoogleBigQuery object, backed by the shared BigQuery client.
+
+        Arguments:
+        . env -> working environment options, "dev" (development) or "prod" (production)
+        . on_server -> whether the access is in local or AWS server
+    """
+
+    return _get_or_create(
+        ("big_query", env, on_server),
+        lambda: GoogleBigQuery(
+            attr=get_credential_accessor(env, on_server).get_attr(),
+            client=get_gbq_client(env, on_server)
+        )
+    )
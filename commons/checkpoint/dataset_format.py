@@ -0,0 +1,154 @@
+import io
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Dict
+
+# Checkpoint format of datasets, and the legacy format that is still readable
+CHECKPOINT_FORMAT: str = "parquet"
+LEGACY_CHECKPOINT_FORMAT: str = "csv"
+PARQUET_COMPRESSION: str = "zstd"
+PARQUET_CONTENT_TYPE: str = "application/vnd.apache.parquet"
+
+# Typed schema of non-text columns for each dataset, text columns are kept as object
+DATASET_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "context_enrichment": {
+        "mitra_id": "int64",
+        "snapshot_dt": "datetime64[ns]"
+    },
+    "detail_mitra": {
+        "mitra_id": "int64"
+    },
+    "smrm_data": {
+        "smrm_rate": "float64"
+    },
+    "gmv_data": {
+        "mitra_id": "int64",
+        "total_gmv": "float64"
+    },
+    "product_substitution": {},
+    "product_candidates": {},
+    "purchase_probs": {
+        "mitra_id": "int64",
+        "trx_date": "datetime64[ns]",
+        "num_orders": "int64"
+    }
+}
+
+def get_checkpoint_path(
+    dataset_name: str,
+    file_format: str = CHECKPOINT_FORMAT
+) -> str:
+    """
+    Obtain checkpoint path of dataset inside the bucket
+
+    Parameters
+    ----------
+        dataset_name: str
+            name of dataset (ex.: 'detail_mitra')
+
+        file_format: str
+            file format of checkpoint, 'parquet' or 'csv'
+
+    Returns
+    ----------
+        file_path: str
+            checkpoint path (ex.: 'datasets/detail_mitra.parquet')
+    """
+    return f"datasets/{dataset_name}.{file_format}"
+
+def apply_schema(
+    dataset: pd.DataFrame,
+    dataset_name: str
+) -> pd.DataFrame:
+    """
+    Cast dataset's columns to their typed schema
+
+    Parameters
+    ----------
+        dataset: pd.DataFrame
+            specified dataset
+
+        dataset_name: str
+            name of dataset, as listed in `DATASET_SCHEMAS`
+
+    Returns
+    ----------
+        typed_dataset: pd.DataFrame
+            dataset with typed columns
+    """
+    schema: Dict[str, str] = {
+        column: dtype for column, dtype in DATASET_SCHEMAS.get(dataset_name, dict()).items()
+        if column in dataset.columns and dataset[column].dtype != dtype
+    }
+
+    return dataset.astype(schema) if schema else dataset
+
+def apply_batch_schema(
+    batch: pa.RecordBatch,
+    dataset_name: str
+) -> pa.RecordBatch:
+    """
+    Cast batch's columns to their typed schema, like `apply_schema` does to a whole dataset
+
+    Parameters
+    ----------
+        batch: pa.RecordBatch
+            specified batch of dataset
+
+        dataset_name: str
+            name of dataset, as listed in `DATASET_SCHEMAS`
+
+    Returns
+    ----------
+        typed_batch: pa.RecordBatch
+            batch with typed columns
+    """
+    schema: pa.Schema = batch.schema
+    for column, dtype in DATASET_SCHEMAS.get(dataset_name, dict()).items():
+        column_index: int = schema.get_field_index(column)
+        if column_index != -1:
+            schema = schema.set(column_index, pa.field(column, pa.from_numpy_dtype(np.dtype(dtype))))
+
+    if schema.equals(batch.schema):
+        return batch
+
+    return pa.Table.from_batches([batch]).cast(schema).combine_chunks().to_batches()[0]
+
+def to_parquet_bytes(
+    dataset: pd.DataFrame
+) -> bytes:
+    """
+    Serialize dataset into compressed Parquet
+
+    Parameters
+    ----------
+        dataset: pd.DataFrame
+            specified dataset
+
+    Returns
+    ----------
+        content: bytes
+            Parquet content
+    """
+    buffer: io.BytesIO = io.BytesIO()
+    dataset.to_parquet(buffer, index=False, compression=PARQUET_COMPRESSION)
+    return buffer.getvalue()
+
+def read_parquet_bytes(
+    content: bytes
+) -> pd.DataFrame:
+    """
+    Deserialize dataset from Parquet
+
+    Parameters
+    ----------
+        content: bytes
+            Parquet content
+
+    Returns
+    ----------
+        dataset: pd.DataFrame
+            specified dataset
+    """
+    return pd.read_parquet(io.BytesIO(content))
@@ -1,8 +1,8 @@
 from google.cloud import storage
+from client_registry import get_gcs_client
 from typing import List
 from pytz import timezone
 from datetime import datetime
-import os
 
 class GoogleCloudStorage:
     def __init__(self, bucket_name: str, env: str, on_server: bool):
@@ -22,24 +22,77 @@ class GoogleCloudStorage:
         self.env = env
         self.on_server = on_server
 
-        self.cred_path = f'./credentials/{env}/{env}.json' if not on_server else '../../keys/sa-gcp-agriaku.json'
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.cred_path
-        
-        # Set bucket of Google Cloud Storage
-        self.create_bucket(bucket_name=bucket_name)
+        # Connected on first use
+        self._storage_client = None
+        self._bucket = None
+        self._bucket_metadata = None
+
+    def __getstate__(self) -> dict:
+        # Clients can't be sent to other processes, they are obtained again on first use
+        return {"bucket_name": self.bucket_name, "env": self.env, "on_server": self.on_server}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def storage_client(self) -> storage.Client:
+        """
+        Shared Google Cloud Storage client, obtained on first use
+        """
+        if self._storage_client is None:
+            self._storage_client = get_gcs_client(env=self.env, on_server=self.on_server)
 
-        # Define bucket
-        self.storage_client = storage.Client.from_service_account_json(json_credentials_path=self.cred_path)
-        self.bucket = self.storage_client.bucket(bucket_name)
+        return self._storage_client
 
+    @property
+    def bucket(self) -> storage.Bucket:
+        """
+        Bucket handle, obtained on first use without any network round trip
+        """
+        if self._bucket is None:
+            self._bucket = self.storage_client.bucket(self.bucket_name)
 
-    def create_bucket(self, bucket_name:str, storage_class:str ='STANDARD', location:str ='asia-southeast2'):
-        storage_client = storage.Client.from_service_account_json(json_credentials_path=self.cred_path)
-        bucket = storage_client.bucket(bucket_name)
+        return self._bucket
+
+    def get_bucket_metadata(self, refresh: bool = False) -> storage.Bucket:
+        """
+        Obtain bucket with its metadata (location, storage class, etc.), fetched once
+
+        Parameters
+        ----------
+            refresh: bool
+                whether to fetch the metadata again
+
+        Returns
+        ----------
+            bucket: storage.Bucket
+                bucket with loaded metadata
+        """
+        if self._bucket_metadata is None or refresh:
+            self._bucket_metadata = self.storage_client.get_bucket(self.bucket_name)
+
+        return self._bucket_metadata
+
+    def create_bucket(self, bucket_name:str = None, storage_class:str ='STANDARD', location:str ='asia-southeast2'):
+        """
+        Provision the bucket if it doesn't exist yet. It is never called implicitly.
+
+        Parameters
+        ----------
+            bucket_name: str
+                bucket name, default to this object's bucket
+
+            storage_class: str
+                storage class of a new bucket
+
+            location: str
+                location of a new bucket
+        """
+        bucket = self.storage_client.bucket(bucket_name or self.bucket_name)
         
         if not bucket.exists():
             bucket.storage_class = storage_class
-            bucket = storage_client.create_bucket(bucket, location=location) 
+            bucket = self.storage_client.create_bucket(bucket, location=location) 
 
 
     def upload_cs_file(self, source_file_name:str, destination_file_name:str): 
@@ -88,7 +141,7 @@ class GoogleCloudStorage:
 
         return file_list
 
-    def get_blob(self, file_name:str):
+    def get_blob(self, file_name:str, generation:int = None):
         """
         Instantiate blob object from specific file
 
@@ -97,11 +150,14 @@ class GoogleCloudStorage:
             file_name: str
                 specified file name
 
+            generation: int
+                specified generation of file, the latest generation if not specified
+
         Returns
         ----------
             blob: blob object of file
         """
-        blob = self.bucket.blob(file_name)
+        blob = self.bucket.blob(file_name, generation=generation)
         return blob
     
     def get_file_created_date(self, file_name:str, timezone_loc:str='Asia/Jakarta'):
@@ -0,0 +1,208 @@
+import os
+import shutil
+import threading
+import pandas as pd
+from pytz import timezone
+from datetime import datetime, date
+from typing import Dict, Optional, Tuple
+from commons.checkpoint.dataset_format import PARQUET_COMPRESSION
+
+# Root directory of local dataset cache, can be overridden per host
+CACHE_DIR: str = os.getenv("DATASET_CACHE_DIR", ".cache/datasets")
+
+class LocalDatasetCache:
+    def __init__(self, cache_dir: str = CACHE_DIR, timezone_loc: str = "Asia/Jakarta"):
+        """
+        Two-level (memory and local disk) cache of datasets checkpointed in Google Cloud Storage.
+        Datasets are kept per day, so a cached dataset is only served on the day it was stored.
+
+        Parameters
+        ----------
+            cache_dir: str
+                root directory of local cache
+
+            timezone_loc: str
+                specified timezone location to decide current date (ex.: 'Asia/Jakarta')
+        """
+        self.cache_dir = cache_dir
+        self.timezone_loc = timezone_loc
+
+        self._memory: Dict[Tuple[str, str], Tuple[date, Optional[int], pd.DataFrame]] = dict()
+        self._lock = threading.Lock()
+
+    def today(self) -> date:
+        """
+        Obtain current date, based on cache's timezone
+
+        Returns
+        ----------
+            current_date: datetime.date
+                current date
+        """
+        return datetime.now(timezone(self.timezone_loc)).date()
+
+    def get_local_path(self, bucket_name: str, file_path: str, snapshot_date: date = None) -> str:
+        """
+        Obtain local path of cached dataset
+
+        Parameters
+        ----------
+            bucket_name: str
+                bucket name, where the dataset is checkpointed
+
+            file_path: str
+                dataset path inside the bucket (ex.: 'datasets/detail_mitra.parquet')
+
+            snapshot_date: datetime.date
+                date of cached dataset, default to current date
+
+        Returns
+        ----------
+            local_path: str
+                local path of cached dataset
+        """
+        snapshot_date: date = snapshot_date or self.today()
+        return os.path.join(self.cache_dir, bucket_name, snapshot_date.isoformat(), file_path)
+
+    def get(self, bucket_name: str, file_path: str, generation: int = None) -> Optional[pd.DataFrame]:
+        """
+        Obtain today's dataset from memory, then from local disk
+
+        Parameters
+        ----------
+            bucket_name: str
+                bucket name, where the dataset is checkpointed
+
+            file_path: str
+                dataset path inside the bucket
+
+            generation: int
+                expected generation of checkpoint's object, any generation if not specified
+
+        Returns
+        ----------
+            dataset: pd.DataFrame | None
+                copy of cached dataset, or None if there is no fresh dataset
+        """
+        key: Tuple[str, str] = (bucket_name, file_path)
+        current_date: date = self.today()
+
+        with self._lock:
+            if key in self._memory:
+                snapshot_date, cached_generation, dataset = self._memory[key]
+                if snapshot_date == current_date and generation in (None, cached_generation):
+                    return dataset.copy()
+
+                del self._memory[key]
+
+            local_path: str = self.get_local_path(bucket_name, file_path, current_date)
+            if not os.path.exists(local_path):
+                return None
+
+            cached_generation: Optional[int] = self.read_generation(local_path)
+            if generation not in (None, cached_generation):
+                return None
+
+            dataset: pd.DataFrame = pd.read_parquet(local_path)
+            self._memory[key] = (current_date, cached_generation, dataset)
+
+        return dataset.copy()
+
+    def put(self, bucket_name: str, file_path: str, dataset: pd.DataFrame, generation: int = None) -> None:
+        """
+        Store dataset in memory and local disk, then remove the expired days
+
+        Parameters
+        ----------
+            bucket_name: str
+                bucket name, where the dataset is checkpointed
+
+            file_path: str
+                dataset path inside the bucket
+
+            dataset: pd.DataFrame
+                dataset to be cached
+
+            generation: int
+                generation of checkpoint's object, where the dataset comes from
+        """
+        current_date: date = self.today()
+        local_path: str = self.get_local_path(bucket_name, file_path, current_date)
+
+        with self._lock:
+            # Write into temporary file first, so readers never see a partial file
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            dataset.to_parquet(local_path + ".tmp", index=False, compression=PARQUET_COMPRESSION)
+            os.replace(local_path + ".tmp", local_path)
+            self.write_generation(local_path, generation)
+
+            self._memory[(bucket_name, file_path)] = (current_date, generation, dataset.copy())
+            self.purge_expired(bucket_name, current_date)
+
+    @staticmethod
+    def read_generation(local_path: str) -> Optional[int]:
+        """
+        Read generation of cached dataset, stored next to it
+
+        Parameters
+        ----------
+            local_path: str
+                local path of cached dataset
+
+        Returns
+        ----------
+            generation: int | None
+                generation of checkpoint's object, None if unknown
+        """
+        try:
+            with open(local_path + ".generation") as generation_file:
+                return int(generation_file.read())
+
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def write_generation(local_path: str, generation: Optional[int]) -> None:
+        """
+        Write generation of cached dataset next to it
+
+        Parameters
+        ----------
+            local_path: str
+                local path of cached dataset
+
+            generation: int | None
+                generation of checkpoint's object, removed if None
+        """
+        if generation is None:
+            if os.path.exists(local_path + ".generation"):
+                os.remove(local_path + ".generation")
+            return
+
+        with open(local_path + ".generation", "w") as generation_file:
+            generation_file.write(str(generation))
+
+    def purge_expired(self, bucket_name: str, current_date: date = None) -> None:
+        """
+        Remove cached datasets from previous days
+
+        Parameters
+        ----------
+            bucket_name: str
+                bucket name, where the dataset is checkpointed
+
+            current_date: datetime.date
+                date to keep, default to current date
+        """
+        current_date: date = current_date or self.today()
+        bucket_dir: str = os.path.join(self.cache_dir, bucket_name)
+
+        if not os.path.isdir(bucket_dir):
+            return
+
+        for snapshot_dir in os.listdir(bucket_dir):
+            if snapshot_dir != current_date.isoformat():
+                shutil.rmtree(os.path.join(bucket_dir, snapshot_dir), ignore_errors=True)
+
+# Shared by all dataset loaders within a process
+dataset_cache: LocalDatasetCache = LocalDatasetCache()
@@ -0,0 +1,176 @@
+import json
+import hashlib
+import threading
+import pandas as pd
+from datetime import date
+from typing import Dict, Optional
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+
+MANIFEST_PATH: str = "datasets/_manifest.json"
+
+def get_schema_hash(
+    dataset: pd.DataFrame
+) -> str:
+    """
+    Obtain hash of dataset's schema (column names and dtypes, in order)
+
+    Parameters
+    ----------
+        dataset: pd.DataFrame
+            specified dataset
+
+    Returns
+    ----------
+        schema_hash: str
+            hash of dataset's schema
+    """
+    schema: str = ";".join(f"{column}:{dtype}" for column, dtype in dataset.dtypes.astype(str).items())
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+class DatasetManifest:
+    def __init__(self, gcs: GoogleCloudStorage):
+        """
+        Manifest of checkpointed datasets, stored as 'datasets/_manifest.json'.
+        Each entry records generation, row count, schema hash, and snapshot date of a checkpoint,
+        so one small read decides which datasets are stale and which object generation to download.
+
+        Parameters
+        ----------
+            gcs: GoogleCloudStorage
+                Google Cloud Storage object
+        """
+        self.gcs = gcs
+        self.entries: Dict[str, dict] = dict()
+        self.generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> "DatasetManifest":
+        """
+        Read the manifest from Google Cloud Storage, an empty manifest if it doesn't exist yet
+
+        Returns
+        ----------
+            manifest: DatasetManifest
+                this manifest
+        """
+        blob = self.gcs.get_blob(MANIFEST_PATH)
+
+        try:
+            content: bytes = blob.download_as_bytes()
+
+        except NotFound:
+            self.entries, self.generation = dict(), 0
+
+        else:
+            self.entries, self.generation = json.loads(content), blob.generation
+
+        return self
+
+    def get_entry(self, dataset_name: str) -> Optional[dict]:
+        """
+        Obtain manifest entry of a dataset
+
+        Parameters
+        ----------
+            dataset_name: str
+                name of dataset (ex.: 'detail_mitra')
+
+        Returns
+        ----------
+            entry: dict | None
+                generation, row count, schema hash, and snapshot date of dataset's checkpoint
+        """
+        return self.entries.get(dataset_name)
+
+    def is_fresh(self, dataset_name: str, current_date: date) -> bool:
+        """
+        Check whether dataset's checkpoint is from current date
+
+        Parameters
+        ----------
+            dataset_name: str
+                name of dataset
+
+            current_date: datetime.date
+                date of a fresh checkpoint
+
+        Returns
+        ----------
+            is_fresh: bool
+                whether the checkpoint is fresh
+        """
+        entry: Optional[dict] = self.get_entry(dataset_name)
+        return entry is not None and entry["snapshot_date"] == current_date.isoformat()
+
+    def record(self, dataset_name: str, file_path: str, generation: int, row_count: int, schema_hash: str, snapshot_date: date) -> None:
+        """
+        Record a new checkpoint, then write the manifest.
+        The write is conditional on manifest's generation, so concurrent writers merge instead of overwriting each other.
+
+        Parameters
+        ----------
+            dataset_name: str
+                name of dataset
+
+            file_path: str
+                checkpoint path inside the bucket
+
+            generation: int
+                generation of checkpoint's object
+
+            row_count: int
+                number of rows of checkpointed dataset
+
+            schema_hash: str
+                hash of checkpointed dataset's schema, see `get_schema_hash`
+
+            snapshot_date: datetime.date
+                date of checkpoint
+        """
+        entry: dict = {
+            "file_path": file_path,
+            "generation": generation,
+            "row_count": row_count,
+            "schema_hash": schema_hash,
+            "snapshot_date": snapshot_date.isoformat()
+        }
+
+        with self._lock:
+            while True:
+                self.entries[dataset_name] = entry
+
+                try:
+                    blob = self.gcs.get_blob(MANIFEST_PATH)
+                    blob.upload_from_string(json.dumps(self.entries, indent=2), "application/json", if_generation_match=self.generation)
+                    self.generation = blob.generation
+                    return
+
+                except PreconditionFailed:
+                    # Other writer has updated the manifest, merge with its entries
+                    self.load()
+
+_manifests: Dict[str, DatasetManifest] = dict()
+_manifests_lock = threading.Lock()
+
+def get_manifest(
+    gcs: GoogleCloudStorage
+) -> DatasetManifest:
+    """
+    Obtain the manifest of a bucket, read once per process
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+    Returns
+    ----------
+        manifest: DatasetManifest
+            manifest of checkpointed datasets
+    """
+    with _manifests_lock:
+        if gcs.bucket_name not in _manifests:
+            _manifests[gcs.bucket_name] = DatasetManifest(gcs).load()
+
+        return _manifests[gcs.bucket_name]
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Tuple
+
+# Name of task -> (function, names of tasks whose results are passed as keyword arguments)
+TaskGraph = Dict[str, Tuple[Callable[..., Any], List[str]]]
+
+def run_task_graph(
+    tasks: TaskGraph,
+    max_workers: int = 8
+) -> Dict[str, Any]:
+    """
+    Run dependent tasks concurrently, each task starts as soon as all of its inputs arrive.
+    Tasks are I/O bound (Google Big Query jobs, Google Cloud Storage downloads), so threads are used.
+
+    Parameters
+    ----------
+        tasks: TaskGraph
+            pairs of task name and (function, dependencies). Function is called with results
+            of its dependencies as keyword arguments, named by dependency's task name
+
+        max_workers: int
+            maximum number of concurrently running tasks
+
+    Returns
+    ----------
+        results: Dict[str, Any]
+            pairs of task name and its result
+    """
+    # Validate dependencies before running anything
+    for task_name, (_, dependencies) in tasks.items():
+        unknown_dependencies: List[str] = [dependency for dependency in dependencies if dependency not in tasks]
+        if unknown_dependencies:
+            raise ValueError("[ERROR] Task `{}` depends on unknown tasks: {}".format(task_name, unknown_dependencies))
+
+    results: Dict[str, Any] = dict()
+    pending: Dict[str, Tuple[Callable[..., Any], List[str]]] = dict(tasks)
+    running: Dict[Future, str] = dict()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            # Submit every task whose inputs have arrived
+            ready_tasks: List[str] = [task_name for task_name, (_, dependencies) in pending.items() if all(dependency in results for dependency in dependencies)]
+            for task_name in ready_tasks:
+                function, dependencies = pending.pop(task_name)
+                kwargs: Dict[str, Any] = {dependency: results[dependency] for dependency in dependencies}
+                running[executor.submit(function, **kwargs)] = task_name
+
+            if not running:
+                raise ValueError("[ERROR] Tasks have circular dependencies: {}".format(list(pending)))
+
+            # Collect finished tasks, failure of any task is propagated
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task_name: str = running.pop(future)
+                results[task_name] = future.result()
+
+    return results
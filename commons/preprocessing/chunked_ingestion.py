@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+import weakref
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import date
+from typing import Dict, Iterator, List
+from dao.google_bigquery import GoogleBigQuery
+from client_registry import get_big_query
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.checkpoint.local_cache import dataset_cache
+from commons.checkpoint.manifest import DatasetManifest, get_manifest, get_schema_hash
+from commons.checkpoint.dataset_format import PARQUET_COMPRESSION, apply_batch_schema, get_checkpoint_path
+from commons.preprocessing.partitions import PartitionedData, PartitionKey
+
+class PartitionStore(PartitionedData):
+    def __init__(self, memory_cap_bytes: int, spill_dir: str = None):
+        """
+        Partitions of context enrichment data per (table_category, metric_category), filled batch by batch.
+        Partitions are kept in memory until `memory_cap_bytes` is reached, then the largest ones are spilled to disk.
+        Indexing follows the nested dict of `structurize_context_enrichment_data`, ex.: store["product_recom"]["rekomendasi_produk"].
+
+        Parameters
+        ----------
+            memory_cap_bytes: int
+                maximum bytes of partitions kept in memory
+
+            spill_dir: str
+                directory of spilled partitions, a temporary directory if not specified
+        """
+        self.memory_cap_bytes = memory_cap_bytes
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="context_enrichment_")
+
+        self._memory: Dict[PartitionKey, List[pd.DataFrame]] = dict()
+        self._memory_bytes: Dict[PartitionKey, int] = dict()
+        self._spilled: Dict[PartitionKey, List[str]] = dict()
+
+        # Spilled partitions are removed once the store is closed or garbage collected, even if the run fails
+        self._finalizer: weakref.finalize = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+
+    def append(self, key: PartitionKey, partition: pd.DataFrame) -> None:
+        """
+        Append rows into a partition, spilling partitions to disk if memory cap is exceeded
+
+        Parameters
+        ----------
+            key: Tuple[str, str]
+                pair of table category and metric category
+
+            partition: pd.DataFrame
+                rows of the partition
+        """
+        self._memory.setdefault(key, []).append(partition)
+        self._memory_bytes[key] = self._memory_bytes.get(key, 0) + int(partition.memory_usage(deep=True).sum())
+
+        while self._memory_bytes and sum(self._memory_bytes.values()) > self.memory_cap_bytes:
+            largest_key: PartitionKey = max(self._memory_bytes, key=self._memory_bytes.get)
+            self.spill(largest_key)
+
+    def spill(self, key: PartitionKey) -> None:
+        """
+        Write in-memory rows of a partition to disk
+
+        Parameters
+        ----------
+            key: Tuple[str, str]
+                pair of table category and metric category
+        """
+        spilled_paths: List[str] = self._spilled.setdefault(key, [])
+        spill_path: str = os.path.join(self.spill_dir, "part_{}.parquet".format(sum(len(paths) for paths in self._spilled.values())))
+
+        pd.concat(self._memory.pop(key), ignore_index=True).to_parquet(spill_path, index=False, compression=PARQUET_COMPRESSION)
+        spilled_paths.append(spill_path)
+        del self._memory_bytes[key]
+
+    def partition_keys(self) -> List[PartitionKey]:
+        """
+        List all (table_category, metric_category) pairs
+
+        Returns
+        ----------
+            keys: List[Tuple[str, str]]
+                pairs of table category and metric category
+        """
+        return list(dict.fromkeys(list(self._spilled) + list(self._memory)))
+
+    def get_partition(self, table_category: str, metric_category: str) -> pd.DataFrame:
+        """
+        Materialize a partition from disk and memory
+
+        Parameters
+        ----------
+            table_category: str
+                specified table category
+
+            metric_category: str
+                specified metric category
+
+        Returns
+        ----------
+            partition: pd.DataFrame
+                all rows of the partition
+        """
+        key: PartitionKey = (table_category, metric_category)
+        if key not in self._spilled and key not in self._memory:
+            raise KeyError(key)
+
+        parts: List[pd.DataFrame] = [pd.read_parquet(path) for path in self._spilled.get(key, [])] + self._memory.get(key, [])
+        return pd.concat(parts, ignore_index=True)
+
+    def close(self) -> None:
+        """
+        Remove spilled partitions from disk
+        """
+        self._finalizer()
+        self._spilled.clear()
+
+def iter_context_enrichment_batches(
+    gcs: GoogleCloudStorage,
+    batch_size: int = 100_000
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream today's context enrichment data in batches, from its checkpoint or from Google Big Query.
+    Streaming from Google Big Query also writes today's checkpoint, one batch at a time.
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+        batch_size: int
+            maximum number of rows per batch, when streaming from the checkpoint
+
+    Returns
+    ----------
+        batches: Iterator[pa.RecordBatch]
+            batches of context enrichment data
+    """
+    file_path: str = get_checkpoint_path("context_enrichment")
+    current_date: date = dataset_cache.today()
+    manifest: DatasetManifest = get_manifest(gcs)
+
+    if manifest.is_fresh("context_enrichment", current_date):
+        entry: dict = manifest.get_entry("context_enrichment")
+        with gcs.get_blob(entry["file_path"], generation=entry["generation"]).open("rb") as checkpoint_file:
+            yield from pq.ParquetFile(checkpoint_file).iter_batches(batch_size=batch_size)
+        return
+
+    big_query: GoogleBigQuery = get_big_query(env=gcs.env, on_server=gcs.on_server)
+
+    # Write a query sample
+    with open("queries/get_context_enrichment_data.sql") as query_file:
+        sample_query = query_file.read()
+
+    # Checkpoint is written locally while streaming, then uploaded at once
+    local_path: str = os.path.join(tempfile.mkdtemp(prefix="context_enrichment_"), "context_enrichment.parquet")
+    writer: pq.ParquetWriter = None
+    row_count: int = 0
+
+    try:
+        for batch in big_query.gbq_read_batches(query=sample_query):
+            # Typed like the checkpoint written by `get_context_enrichment_data`
+            batch = apply_batch_schema(batch, "context_enrichment")
+            writer = writer or pq.ParquetWriter(local_path, batch.schema, compression=PARQUET_COMPRESSION)
+            writer.write_batch(batch)
+            row_count += batch.num_rows
+            yield batch
+
+        if writer is not None:
+            writer.close()
+            writer = None
+
+            blob = gcs.get_blob(file_path)
+            blob.upload_from_filename(local_path)
+
+            schema_hash: str = get_schema_hash(pq.read_schema(local_path).empty_table().to_pandas())
+            manifest.record("context_enrichment", file_path, blob.generation, row_count, schema_hash, current_date)
+
+    finally:
+        if writer is not None:
+            writer.close()
+
+        shutil.rmtree(os.path.dirname(local_path), ignore_errors=True)
+
+def ingest_context_enrichment_data(
+    gcs: GoogleCloudStorage,
+    memory_cap_bytes: int,
+    spill_dir: str = None,
+    batch_size: int = 100_000
+) -> PartitionStore:
+    """
+    Ingest today's context enrichment data in bounded batches, routing each batch into
+    per-(table_category, metric_category) partitions. It is the bounded-memory counterpart of
+    `get_context_enrichment_data` followed by `structurize_context_enrichment_data`.
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+        memory_cap_bytes: int
+            maximum bytes of partitions kept in memory, the rest is spilled to disk
+
+        spill_dir: str
+            directory of spilled partitions, a temporary directory if not specified
+
+        batch_size: int
+            maximum number of rows per batch, when streaming from the checkpoint
+
+    Returns
+    ----------
+        store: PartitionStore
+            partitioned context enrichment data
+    """
+    store: PartitionStore = PartitionStore(memory_cap_bytes=memory_cap_bytes, spill_dir=spill_dir)
+
+    for batch in iter_context_enrichment_batches(gcs, batch_size=batch_size):
+        batch_df: pd.DataFrame = batch.to_pandas()
+
+        # Remove column `prc_dt`, and fill missing values
+        batch_df = batch_df.drop("prc_dt", axis=1, errors="ignore")
+        batch_df.fillna({"value": "Tidak ada"}, inplace=True)
+
+        for key, partition in batch_df.groupby(["table_category", "metric_category"], sort=False):
+            store.append(key, partition)
+
+    return store
@@ -1,14 +1,23 @@
+import re
+import numpy as np
 import pandas as pd
 import functools as ft
 from typing import List, Union, Any, Tuple
 from commons.checkpoint.google_cloud_console import GoogleCloudStorage
-from commons.preprocessing.import_data import get_smrm_data, get_gmv_data
+from commons.preprocessing.import_data import get_smrm_data, get_gmv_data, get_purchase_prob_data
+from commons.preprocessing.purchase_prob import calculate_purchase_probs
+from commons.preprocessing.product_dictionary import get_product_dictionary, normalize_product_name
+from commons.preprocessing.partitions import PartitionedData, GroupedPartitions
+
+# Number of recommended products kept per mitra
+DEFAULT_TOP_K: int = 5
 
 def structurize_context_enrichment_data(
     context_enrichment_data: pd.DataFrame
-) -> dict:
+) -> PartitionedData:
     """
-    Preprocess context enrichment data to be more structured
+    Preprocess context enrichment data to be more structured.
+    Rows are partitioned in one grouped pass, and a partition is only materialized when it is accessed.
 
     Parameters
     ----------
@@ -17,24 +26,104 @@ def structurize_context_enrichment_data(
 
     Returns
     ----------
-        context_enrichment_dict: dict
-            structued context enrichment data
+        context_enrichment_dict: PartitionedData
+            structued context enrichment data, indexed as data[table_category][metric_category]
     """
-    data: dict = dict()
-    table_categories: List[str] = context_enrichment_data["table_category"].unique()
+    return GroupedPartitions(context_enrichment_data)
+
+def unmelt_context_enrichment(
+    data: pd.DataFrame,
+    index: List[str] = None,
+    columns: str = "metric_name",
+    values: str = "value",
+    delimiter: str = " ; "
+) -> pd.DataFrame:
+    """
+    Unmelt long, delimited context enrichment data straight into the wide, exploded table.
+    Each `values` cell holds `delimiter`-separated items, the i-th items of one index's cells form its i-th row.
+    Splitting is vectorized, and items are scattered into a preallocated output by their (row, column) positions.
+
+    Parameters
+    ----------
+        data: pd.DataFrame
+            long data, with `index`, `columns`, and `values` columns
+
+        index: List[str]
+            columns to use to make new frame's index, default to ["mitra_id", "snapshot_dt"]
+
+        columns: str
+            column to use to make new frame's columns, sorted by name
+
+        values: str
+            column of delimited items
+
+        delimiter: str
+            delimiter of items
+
+    Returns
+    ----------
+        unmelted_data: pd.DataFrame
+            wide data, one row per item position of each index, sorted by index
+    """
+    index = ["mitra_id", "snapshot_dt"] if index is None else list(index)
+
+    # Only first row of each pair of index and metric is used
+    data = data.drop_duplicates(subset=index + [columns])
 
-    for table_category in table_categories:
-        # List all tables
-        table_category_df: pd.DataFrame = context_enrichment_data[context_enrichment_data["table_category"] == table_category]
-        metric_categories: List[str] = table_category_df["metric_category"].unique()
-        data[table_category] = dict()
+    # Codes of each index column are combined, so rows are numbered in sorted order of index
+    row_codes: np.ndarray = np.zeros(len(data), dtype=np.int64)
+    for column in index:
+        codes, uniques = pd.factorize(data[column], sort=True)
+        row_codes = row_codes * len(uniques) + codes
+    _, first_positions, row_codes = np.unique(row_codes, return_index=True, return_inverse=True)
+    row_keys: pd.DataFrame = data[index].iloc[first_positions].reset_index(drop=True)
 
-        for metric_category in metric_categories:
-            # List all metric categories
-            metric_category_df: pd.DataFrame = table_category_df[table_category_df["metric_category"] == metric_category]
-            data[table_category][metric_category] = metric_category_df.reset_index(drop=True)
+    column_codes, column_names = pd.factorize(data[columns], sort=True)
 
-    return data
+    # Missing cell is counted as one missing item
+    cell_values: pd.Series = data[values].reset_index(drop=True)
+    is_string: np.ndarray = cell_values.str.len().notna().to_numpy()
+    strings: List[str] = cell_values[is_string].tolist()
+    item_counts: np.ndarray = np.ones(len(cell_values), dtype=np.int64)
+    item_counts[is_string] = cell_values[is_string].str.count(re.escape(delimiter)).to_numpy() + 1
+
+    # Split all cells at once, through one joined string
+    string_items: List[str] = delimiter.join(strings).split(delimiter) if strings else []
+    if len(string_items) != item_counts[is_string].sum():
+        # Delimiter overlaps across cells' boundaries, split each cell instead
+        string_items = [item for string in strings for item in string.split(delimiter)]
+
+    items: np.ndarray = np.full(int(item_counts.sum()), np.nan, dtype=object)
+    items[np.repeat(is_string, item_counts)] = string_items
+
+    # Cells of the same index must have the same number of items
+    num_rows: int = len(row_keys)
+    row_lengths: np.ndarray = np.zeros(num_rows, dtype=np.int64)
+    row_min_lengths: np.ndarray = np.full(num_rows, np.iinfo(np.int64).max, dtype=np.int64)
+    np.maximum.at(row_lengths, row_codes, item_counts)
+    np.minimum.at(row_min_lengths, row_codes, item_counts)
+
+    # Absent cell of an index is counted as one missing item, like a missing cell
+    has_absent_cell: np.ndarray = np.bincount(row_codes, minlength=num_rows) < len(column_names)
+    row_min_lengths[has_absent_cell] = np.minimum(row_min_lengths[has_absent_cell], 1)
+    if (row_lengths != row_min_lengths).any():
+        raise ValueError("columns must have matching element counts")
+
+    # Position of each item inside its cell, then inside the output
+    cell_starts: np.ndarray = np.cumsum(item_counts) - item_counts
+    item_positions: np.ndarray = np.arange(len(items)) - np.repeat(cell_starts, item_counts)
+    row_offsets: np.ndarray = np.cumsum(row_lengths) - row_lengths
+    output_rows: np.ndarray = np.repeat(row_offsets[row_codes], item_counts) + item_positions
+    output_columns: np.ndarray = np.repeat(column_codes, item_counts)
+
+    output: np.ndarray = np.full((int(row_lengths.sum()), len(column_names)), np.nan, dtype=object)
+    output[output_rows, output_columns] = items
+
+    unmelted_data: pd.DataFrame = row_keys.iloc[np.repeat(np.arange(num_rows), row_lengths)].reset_index(drop=True)
+    for column_position, column_name in enumerate(column_names):
+        unmelted_data[column_name] = output[:, column_position]
+
+    return unmelted_data
 
 def modify_data(data: pd.DataFrame):
     """
@@ -47,53 +136,58 @@ def modify_data(data: pd.DataFrame):
 
     Returns
     ----------
-        modified_data: dict
-            modified data
+        modified_data: pd.DataFrame
+            modified data, one row per product of each mitra
+    """
+    return unmelt_context_enrichment(data, index=["mitra_id", "snapshot_dt"], columns="metric_name")
+
+def select_top_k(
+    data: pd.DataFrame,
+    group_column: str,
+    sort_columns: List[str],
+    k: int = DEFAULT_TOP_K
+) -> pd.DataFrame:
+    """
+    Select first `k` rows of each group, ordered by `sort_columns` descending (missing values last).
+    Rows ranked beyond `k` by the first sort column can't be selected, so they're dropped before sorting,
+    and only the remaining candidates are sorted.
+
+    Parameters
+    ----------
+        data: pd.DataFrame
+            specified data
+
+        group_column: str
+            column of groups (ex.: 'mitra_id')
+
+        sort_columns: List[str]
+            columns to order rows within each group, by priority
+
+        k: int
+            maximum number of rows per group
+
+    Returns
+    ----------
+        top_k_data: pd.DataFrame
+            first `k` rows of each group, sorted by group then by `sort_columns`
     """
-    def unmelt_df(
-        melted_df: pd.DataFrame,
-        index: Union[str, List[str]],
-        columns: Union[str, List[str]]
-    ) -> dict:
-        """
-        Unmelt the melted data
-
-        Parameters
-        ----------
-            melted_df: pd.DataFrame
-                specified data
-
-            columns : str or list of str
-                columns to use to make new frame's columns.
-
-            index : str or list of str
-                columns to use to make new frame's index.
-
-        Returns
-        ----------
-            result_dict: dict
-                pairs of metric category and corresponding data
-        """
-        unmelted_df: pd.DataFrame = melted_df.pivot(index=index, columns=columns)
-        unmelted_df = unmelted_df['value'].reset_index()
-        unmelted_df.columns.name = None
-        return unmelted_df
-    
-    # Assign values to be able to extract
-    data["value"] = data["value"].str.split(" ; ")
-    data = data.drop_duplicates(subset=["mitra_id", "metric_name"])
-
-    # Unmelt the data
-    data = unmelt_df(data, index=["mitra_id", "snapshot_dt"], columns=["metric_name"])
-    columns_to_explode: List[str] = data.columns.tolist()[2:]
-    data = data.explode(columns_to_explode).reset_index(drop=True)
-    
-    return data
+    if k <= 0:
+        raise ValueError("[ERROR] k must be positive, got {}".format(k))
+
+    # Rank is one plus number of rows with strictly higher value, ties share the same rank
+    first_rank: pd.Series = data.groupby(group_column)[sort_columns[0]].rank(method="min", ascending=False, na_option="bottom")
+    candidates: pd.DataFrame = data[first_rank.to_numpy() <= k]
+
+    candidates = candidates.sort_values([group_column] + sort_columns, ascending=[True] + [False] * len(sort_columns), kind="stable")
+    return candidates.groupby(group_column, sort=False).head(k)
 
 def get_product_recommendation(
     product_recommendation: pd.DataFrame,
     detail_mitra: pd.DataFrame,
-    gcs: GoogleCloudStorage
+    gcs: GoogleCloudStorage,
+    smrm_data: pd.DataFrame = None,
+    gmv_data: pd.DataFrame = None,
+    top_k: int = DEFAULT_TOP_K
 ) -> pd.DataFrame:
     """
     Obtain data regarding to product recommendation, which based from context enrichment data
@@ -109,6 +203,15 @@ def get_product_recommendation(
         gcs: GoogleCloudStorage
             an instance of Google Cloud Storage
 
+        smrm_data: pd.DataFrame
+            already acquired SMRM data, loaded from `gcs` if not specified
+
+        gmv_data: pd.DataFrame
+            already acquired GMV data, loaded from `gcs` if not specified
+
+        top_k: int
+            number of products kept per mitra, by highest GMV then highest SMRM rate
+
     Returns
     ----------
         product_recommendation: pd.DataFrame
@@ -117,35 +220,81 @@ def get_product_recommendation(
     # Data Preprocessing
     product_recommendation: pd.DataFrame = modify_data(product_recommendation)
     product_recommendation.drop("snapshot_dt", axis=1, inplace=True, errors="ignore")
-    product_recommendation["nama_produk"] = product_recommendation["nama_produk"].apply(lambda product: product.upper().strip()).replace({"TIDAK ADA": "Tidak ada"})
+
+    # Placeholder of missing product isn't a product, so it gets no product id and is never recommended
+    product_names: pd.Series = normalize_product_name(product_recommendation["nama_produk"])
+    product_recommendation["nama_produk"] = product_names.where(product_names != "TIDAK ADA")
+    product_recommendation = get_product_dictionary(gcs).encode(product_recommendation, {"nama_produk": "produk_id"})
 
     # Get SMRM and GMV data
-    smrm_data: pd.DataFrame = get_smrm_data(gcs)
-    gmv_data: pd.DataFrame = get_gmv_data(gcs)
-
-    # Concatenate product recommendation with mitra details
-    product_recommendation = product_recommendation.merge(
-        detail_mitra,
-        on="mitra_id"
-    ).rename(columns={"region_mitra": "region"})
-
-    # Concatenate product recommendation with GMV data
-    product_recommendation = product_recommendation.merge(
-        gmv_data,
-        how="left",
-        on=["mitra_id", "nama_produk"]
-    )
+    smrm_data: pd.DataFrame = get_smrm_data(gcs) if smrm_data is None else smrm_data
+    gmv_data: pd.DataFrame = get_gmv_data(gcs) if gmv_data is None else gmv_data
 
-    # Concatenate product recommendation with SMRM data
-    product_recommendation = product_recommendation.merge(
-        smrm_data,
-        how="left",
-        on=["region", "nama_produk"]
-    )
+    # Index lookup tables by their join keys, only products with positive smrm rate can be recommended.
+    # Products without master name have no id, and a missing level of a join key would match wrong rows.
+    detail_mitra = detail_mitra.rename(columns={"region_mitra": "region"}).set_index("mitra_id")
+    gmv_data = gmv_data.dropna(subset=["produk_id"]).set_index(["mitra_id", "produk_id"])[["total_gmv"]]
+    smrm_data = smrm_data[(smrm_data["smrm_rate"] > 0) & smrm_data["produk_id"].notna()].set_index(["region", "produk_id"])[["smrm_rate"]]
+
+    # Concatenate product recommendation with mitra details, GMV data, and SMRM data
+    product_recommendation = product_recommendation.join(detail_mitra, on="mitra_id", how="inner")
+    product_recommendation = product_recommendation.join(gmv_data, on=["mitra_id", "produk_id"], how="left")
+    product_recommendation = product_recommendation.join(smrm_data, on=["region", "produk_id"], how="inner")
+
+    # Obtain first products with highest GMV, then highest SMRM, for each mitra
+    product_recommendation = select_top_k(product_recommendation, "mitra_id", ["total_gmv", "smrm_rate"], k=top_k)
+    return product_recommendation.drop(["total_gmv", "smrm_rate"], axis=1, errors="ignore")
+
+def get_purchase_probability(
+    gcs: GoogleCloudStorage,
+    transactions: pd.DataFrame = None,
+    method: str = "closed_form",
+    n_simulation: int = 10_000,
+    tolerance: float = 0.01,
+    max_workers: int = None
+) -> pd.DataFrame:
+    """
+    Obtain purchase probability of every mitra to every product they have bought, from weekly number of orders
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            an instance of Google Cloud Storage
+
+        transactions: pd.DataFrame
+            already acquired transactions, loaded from `gcs` if not specified
+
+        method: str
+            'closed_form' or 'simulation', see `calculate_purchase_probs`
 
-    # Choose products with positive smrm rate only
-    product_recommendation = product_recommendation[product_recommendation["smrm_rate"] > 0]
+        n_simulation: int
+            maximum number of simulation per pair of mitra and product, if `method` is 'simulation'
+
+        tolerance: float
+            stop simulating once interval of the probability is narrower than this, if `method` is 'simulation'
+
+        max_workers: int
+            number of processes, if `method` is 'simulation'
+
+    Returns
+    ----------
+        purchase_probability: pd.DataFrame
+            columns `mitra_id`, `nama_produk`, `produk_id`, and `probabilitas_pembelian`
+    """
+    transactions: pd.DataFrame = get_purchase_prob_data(gcs) if transactions is None else transactions
+    transactions = transactions.assign(nama_produk=normalize_product_name(transactions["nama_produk"]))
+
+    purchase_probability: pd.DataFrame = calculate_purchase_probs(
+        transactions=transactions,
+        key_columns=["mitra_id", "nama_produk"],
+        date_col="trx_date",
+        column_to_observe="num_orders",
+        freq="W",
+        n_simulation=n_simulation,
+        max_workers=max_workers,
+        tolerance=tolerance,
+        method=method
+    )
 
-    # Obtain first five products with highest SMRM for each mitra
-    product_recommendation = product_recommendation.sort_values(["mitra_id", "total_gmv", "smrm_rate"], ascending=[True, False, False]).groupby("mitra_id").head(5)
-    return product_recommendation.drop(["total_gmv", "smrm_rate"], axis=1, errors="ignore")
\ No newline at end of file
+    purchase_probability = purchase_probability.rename(columns={"purchase_prob": "probabilitas_pembelian"}).drop("n_simulation_used", axis=1)
+    return get_product_dictionary(gcs).encode(purchase_probability, {"nama_produk": "produk_id"})
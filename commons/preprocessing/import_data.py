@@ -1,81 +1,221 @@
+import io
 import pandas as pd
 from dao.google_bigquery import GoogleBigQuery
-from credential_accessor import CredentialAccessor
+from client_registry import get_big_query
 from gcsfs.retry import HttpError
-from typing import List, Tuple
+from google.cloud.exceptions import NotFound
+from typing import Callable, List, Tuple
 from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.checkpoint.local_cache import LocalDatasetCache, dataset_cache
+from commons.checkpoint.manifest import DatasetManifest, get_manifest, get_schema_hash
+from commons.preprocessing.rolling_window import gmv_window, smrm_window
+from commons.preprocessing.product_dictionary import get_product_dictionary, normalize_product_name
+from commons.checkpoint.dataset_format import CHECKPOINT_FORMAT, LEGACY_CHECKPOINT_FORMAT, PARQUET_CONTENT_TYPE
+from commons.checkpoint.dataset_format import apply_schema, get_checkpoint_path, read_parquet_bytes, to_parquet_bytes
 from datetime import datetime
 
-def get_context_enrichment_data(
-    gcs: GoogleCloudStorage
-) -> pd.DataFrame:
+def read_checkpoint(
+    gcs: GoogleCloudStorage,
+    dataset_name: str,
+    current_date: datetime.date,
+    manifest: DatasetManifest
+) -> Tuple[pd.DataFrame, int]:
     """
-    Get current context enrichment data
+    Read today's checkpoint of dataset from Google Cloud Storage, fall back to checkpoints which are not in the manifest yet.
+    A dataset recorded in the manifest with an older snapshot is stale, so no file is listed for it.
 
     Parameters
     ----------
         gcs: GoogleCloudStorage
             Google Cloud Storage object
 
+        dataset_name: str
+            name of dataset (ex.: 'detail_mitra')
+
+        current_date: datetime.date
+            date of a fresh checkpoint
+
+        manifest: DatasetManifest
+            manifest of checkpointed datasets
+
     Returns
     ----------
-        context_enrichment_df: pd.DataFrame
-            context enrichment data
-    """ 
-    try:
-        file_path: str = "datasets/context_enrichment.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}"
-        sample_df: pd.DataFrame = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_context_enrichment_data.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        sample_df: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(sample_df.to_csv(index=False), "text/csv")
-
-    else:
+        dataset: pd.DataFrame
+            checkpointed dataset
+
+        generation: int
+            generation of checkpoint's object
+    """
+    if manifest.is_fresh(dataset_name, current_date):
+        # Download exactly the generation recorded in the manifest
+        entry: dict = manifest.get_entry(dataset_name)
+        content: bytes = gcs.get_blob(entry["file_path"], generation=entry["generation"]).download_as_bytes()
+        return read_parquet_bytes(content), entry["generation"]
+
+    if manifest.get_entry(dataset_name) is not None:
+        raise FileNotFoundError(get_checkpoint_path(dataset_name))
+
+    for file_format in [CHECKPOINT_FORMAT, LEGACY_CHECKPOINT_FORMAT]:
         # Compare file created date with current date
+        file_path: str = get_checkpoint_path(dataset_name, file_format)
         file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
         if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
+            continue
+
+        blob = gcs.get_blob(file_path)
+        content: bytes = blob.download_as_bytes()
+
+        if file_format == CHECKPOINT_FORMAT:
+            dataset: pd.DataFrame = read_parquet_bytes(content)
+            generation: int = blob.generation
+            manifest.record(dataset_name, file_path, generation, len(dataset), get_schema_hash(dataset), current_date)
+            return dataset, generation
+
+        # Migrate legacy checkpoint, so the next reads are columnar
+        dataset: pd.DataFrame = apply_schema(pd.read_csv(io.BytesIO(content)), dataset_name)
+        return dataset, write_checkpoint(gcs, dataset_name, dataset, current_date, manifest)
+
+    raise FileNotFoundError(get_checkpoint_path(dataset_name))
+
+def write_checkpoint(
+    gcs: GoogleCloudStorage,
+    dataset_name: str,
+    dataset: pd.DataFrame,
+    current_date: datetime.date,
+    manifest: DatasetManifest
+) -> int:
+    """
+    Write checkpoint of dataset as compressed Parquet into Google Cloud Storage, and record it in the manifest
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+        dataset_name: str
+            name of dataset (ex.: 'detail_mitra')
+
+        dataset: pd.DataFrame
+            dataset to be checkpointed
+
+        current_date: datetime.date
+            snapshot date of checkpoint
+
+        manifest: DatasetManifest
+            manifest of checkpointed datasets
+
+    Returns
+    ----------
+        generation: int
+            generation of checkpoint's object
+    """
+    file_path: str = get_checkpoint_path(dataset_name)
+    blob = gcs.get_blob(file_path)
+    blob.upload_from_string(to_parquet_bytes(dataset), PARQUET_CONTENT_TYPE)
+
+    manifest.record(dataset_name, file_path, blob.generation, len(dataset), get_schema_hash(dataset), current_date)
+    return blob.generation
+
+def load_dataset(
+    gcs: GoogleCloudStorage,
+    dataset_name: str,
+    query_file_path: str = None,
+    transform: Callable[[pd.DataFrame], pd.DataFrame] = None,
+    cache: LocalDatasetCache = dataset_cache,
+    fetch: Callable[[GoogleBigQuery], pd.DataFrame] = None
+) -> pd.DataFrame:
+    """
+    Load today's dataset from local cache, then from Google Cloud Storage checkpoint, then from Google Big Query.
+    Freshness is decided by the dataset manifest, and a checkpoint is downloaded only if its generation is not cached locally.
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+        dataset_name: str
+            name of dataset, its checkpoint is 'datasets/<dataset_name>.parquet'
+
+        query_file_path: str
+            query file to be run if there is no fresh checkpoint
 
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
+        transform: Callable[[pd.DataFrame], pd.DataFrame]
+            preprocessing applied to query result, before it is checkpointed
 
+        cache: LocalDatasetCache
+            local dataset cache
+
+        fetch: Callable[[GoogleBigQuery], pd.DataFrame]
+            custom acquisition from Google Big Query, used instead of `query_file_path`
+
+    Returns
+    ----------
+        dataset: pd.DataFrame
+            requested dataset
+    """
+    file_path: str = get_checkpoint_path(dataset_name)
+    current_date: datetime.date = cache.today()
+    manifest: DatasetManifest = get_manifest(gcs)
+
+    # Serve repeated reads from local cache, as long as the checkpoint hasn't changed
+    expected_generation: int = manifest.get_entry(dataset_name)["generation"] if manifest.is_fresh(dataset_name, current_date) else None
+    dataset: pd.DataFrame = cache.get(gcs.bucket_name, file_path, generation=expected_generation)
+    if dataset is not None:
+        return dataset
+
+    try:
+        dataset, generation = read_checkpoint(gcs, dataset_name, current_date, manifest)
+
+    except (HttpError, NotFound, FileNotFoundError):
+        big_query: GoogleBigQuery = get_big_query(env=gcs.env, on_server=gcs.on_server)
+
+        if fetch is not None:
+            dataset: pd.DataFrame = fetch(big_query)
+
+        else:
             # Write a query sample
-            query_file_path: str = "queries/get_context_enrichment_data.sql"
             with open(query_file_path) as query_file:
                 sample_query = query_file.read()
 
             # Read big query into pd.DataFrame
-            sample_df: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(sample_df.to_csv(index=False), "text/csv")
+            dataset: pd.DataFrame = big_query.gbq_read_arrow(query=sample_query, use_cache=True)
+
+        if transform is not None:
+            dataset: pd.DataFrame = transform(dataset)
+
+        dataset: pd.DataFrame = apply_schema(dataset, dataset_name)
+        generation: int = write_checkpoint(gcs, dataset_name, dataset, current_date, manifest)
 
-    finally:
-        # Remove column `prc_dt`
-        sample_df = sample_df.drop("prc_dt", axis=1, errors="ignore")
+    cache.put(gcs.bucket_name, file_path, dataset, generation=generation)
+    return dataset
 
-        # Fill missing values
-        sample_df.fillna({"value": "Tidak ada"}, inplace=True)
+def get_context_enrichment_data(
+    gcs: GoogleCloudStorage
+) -> pd.DataFrame:
+    """
+    Get current context enrichment data
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+    Returns
+    ----------
+        context_enrichment_df: pd.DataFrame
+            context enrichment data
+    """ 
+    sample_df: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="context_enrichment",
+        query_file_path="queries/get_context_enrichment_data.sql"
+    )
+
+    # Remove column `prc_dt`
+    sample_df = sample_df.drop("prc_dt", axis=1, errors="ignore")
+
+    # Fill missing values
+    sample_df.fillna({"value": "Tidak ada"}, inplace=True)
 
     return sample_df
 
@@ -84,7 +224,8 @@ def get_purchase_prob_data(
     gcs: GoogleCloudStorage
 ) -> pd.DataFrame:
     """
-    Obtain purchase probability of mitra to specific product data.
+    Obtain data to calculate purchase probability of mitra to specific product,
+    which is number of completed orders per day of every mitra and product within the last year.
 
     Parameters
     ----------
@@ -94,55 +235,13 @@ def get_purchase_prob_data(
     Returns
     ----------
         prob_data: pd.DataFrame
-            purchase probability data
+            long-format transactions, with columns `trx_date`, `mitra_id`, `nama_produk`, and `num_orders`
     """
-    try:
-        file_path: str = "datasets/purchase_probs.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}" 
-        prob_data = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_propensity_to_buy.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        prob_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(prob_data.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
-
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
-
-            # Write a query sample
-            query_file_path: str = "queries/get_propensity_to_buy.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
-
-            # Read big query into pd.DataFrame
-            prob_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(prob_data.to_csv(index=False), "text/csv")
+    prob_data: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="purchase_probs",
+        query_file_path="queries/get_propensity_to_buy.sql"
+    )
     
     return prob_data
 
@@ -162,58 +261,17 @@ def get_detail_mitra(
         detail_mitra: pd.DataFrame
             data of detail mitra
     """
-    try:
-        file_path: str = "datasets/detail_mitra.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}"
-        detail_mitra: pd.DataFrame = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_detail_mitra.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        detail_mitra: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(detail_mitra.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
-
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
-
-            # Write a query sample
-            query_file_path: str = "queries/get_detail_mitra.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
-
-            # Read big query into pd.DataFrame
-            detail_mitra: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(detail_mitra.to_csv(index=False), "text/csv")
+    detail_mitra: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="detail_mitra",
+        query_file_path="queries/get_detail_mitra.sql"
+    )
     
     return detail_mitra
 
 def get_smrm_data(
-    gcs: GoogleCloudStorage
+    gcs: GoogleCloudStorage,
+    mitra_ids: pd.Series = None
 ) -> pd.DataFrame:
     """
     Obtain SMRM data.
@@ -223,62 +281,31 @@ def get_smrm_data(
         gcs: GoogleCloudStorage
             Google Cloud Storage object
 
+        mitra_ids: pd.Series
+            ids of today's mitra, obtained from `get_detail_mitra` if not specified
+
     Returns
     ----------
         smrm_data: pd.DataFrame
             smrm data
     """
-    try:
-        file_path: str = "datasets/smrm_data.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}" 
-        smrm_data: pd.DataFrame = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_smrm_products.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        smrm_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(smrm_data.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
+    def fetch_smrm_data(big_query: GoogleBigQuery) -> pd.DataFrame:
+        # Only mitra in today's context enrichment are considered
+        partials: pd.DataFrame = smrm_window.update(gcs, big_query)
+        partials = partials[partials["mitra_id"].isin(get_detail_mitra(gcs)["mitra_id"] if mitra_ids is None else mitra_ids)]
 
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
+        smrm_data: pd.DataFrame = smrm_window.aggregate(partials, key_columns=["region", "nama_produk"])
+        smrm_data["smrm_rate"] = smrm_data["smrm"] / smrm_data["cogs"].where(smrm_data["cogs"] != 0)
+        return smrm_data[["region", "nama_produk", "smrm_rate"]]
 
-            # Write a query sample
-            query_file_path: str = "queries/get_smrm_products.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
+    smrm_data: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="smrm_data",
+        fetch=fetch_smrm_data
+    )
 
-            # Read big query into pd.DataFrame
-            smrm_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(smrm_data.to_csv(index=False), "text/csv")
-            
-    finally:
-        # Normalize product name
-        smrm_data["nama_produk"] = smrm_data["nama_produk"].apply(lambda product: product.upper().strip())
+    # Normalize product name, and key it by product id
+    smrm_data = get_product_dictionary(gcs).encode(smrm_data, {"nama_produk": "produk_id"})
 
     return smrm_data
 
@@ -298,59 +325,54 @@ def get_gmv_data(
         gmv_data: pd.DataFrame
             GMV data
     """
-    try:
-        file_path: str = "datasets/gmv_data.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}" 
-        gmv_data: pd.DataFrame = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_product_gmv.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        gmv_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(gmv_data.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
+    def fetch_gmv_data(big_query: GoogleBigQuery) -> pd.DataFrame:
+        partials: pd.DataFrame = gmv_window.update(gcs, big_query)
+        return gmv_window.aggregate(partials).rename(columns={"gmv": "total_gmv"})
 
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
+    gmv_data: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="gmv_data",
+        fetch=fetch_gmv_data
+    )
 
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
+    # Normalize product name, and key it by product id
+    gmv_data = get_product_dictionary(gcs).encode(gmv_data, {"nama_produk": "produk_id"})
 
-            # Write a query sample
-            query_file_path: str = "queries/get_product_gmv.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
+    return gmv_data
 
-            # Read big query into pd.DataFrame
-            gmv_data: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(gmv_data.to_csv(index=False), "text/csv")
-            
-    finally:
-        # Normalize product name
-        gmv_data["nama_produk"] = gmv_data["nama_produk"].apply(lambda product: product.upper().strip())
+def filter_better_margin_substitutes(
+    product_substitution_temp: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Ignore product substitutes of base products, which have any substitute with lower margin.
 
-    return gmv_data
+    Parameters
+    ----------
+        product_substitution_temp: pd.DataFrame
+            raw product substitutes from Mystique
+
+    Returns
+    ----------
+        product_substitution: pd.DataFrame
+            structured product substitutes
+    """
+    # Pairs with missing region or base product are never matched
+    product_substitution: pd.DataFrame = product_substitution_temp.dropna(subset=["region", "produk_awal"]).copy()
+
+    # If there is product with lower margin, we will ignore these products
+    is_worse_margin: pd.Series = product_substitution["is_better_margin"] == False
+    has_worse_margin: pd.Series = is_worse_margin.groupby([product_substitution["region"], product_substitution["produk_awal"]]).transform("any")
+
+    substitute_columns: List[str] = ["produk_substitusi", "pemasok_produk_substitusi", "harga_produk_substitusi", "bahan_aktif_produk_substitusi"]
+    product_substitution[substitute_columns] = product_substitution[substitute_columns].astype(object)
+    product_substitution.loc[has_worse_margin, substitute_columns] = None
+
+    # Structurize the corresponding table
+    product_substitution["produk_awal"] = normalize_product_name(product_substitution["produk_awal"])
+    product_substitution["produk_substitusi"] = normalize_product_name(product_substitution["produk_substitusi"])
+    product_substitution.reset_index(drop=True, inplace=True)
+
+    return product_substitution
         
 def get_product_substitutes(
     gcs: GoogleCloudStorage
@@ -368,87 +390,18 @@ def get_product_substitutes(
         product_substitutes: pd.DataFrame
             product substitutes
     """
-    try:
-        file_path: str = "datasets/product_substitution.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}" 
-        product_substitution = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_product_substitutes_from_mystique.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        product_substitution_temp: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        product_substitution: pd.DataFrame = pd.DataFrame(columns=product_substitution_temp.columns)
-
-        # Filter product substitutes with better margin
-        region_base_prd_pairs: List[Tuple[str]] = list(set(zip(product_substitution_temp["region"], product_substitution_temp["produk_awal"])))
-
-        for region, base_prd in region_base_prd_pairs:
-            # If there is product with lower margin, we will ignore these products
-            sub_product_substitution: pd.DataFrame = product_substitution_temp[(product_substitution_temp["region"] == region) & (product_substitution_temp["produk_awal"] == base_prd)]
-            if False in sub_product_substitution["is_better_margin"].unique():
-                sub_product_substitution[["produk_substitusi", "pemasok_produk_substitusi", "harga_produk_substitusi", "bahan_aktif_substitusi"]] = None
-
-            product_substitution: pd.DataFrame = pd.concat([product_substitution, sub_product_substitution])
-
-        # Structurize the corresponding table
-        product_substitution["produk_awal"] = product_substitution["produk_awal"].apply(lambda product: product.upper().strip() if type(product) == str else None)
-        product_substitution["produk_substitusi"] = product_substitution["produk_substitusi"].apply(lambda product: product.upper().strip() if type(product) == str else None)
-        product_substitution.reset_index(drop=True, inplace=True)
-        gcs.get_blob(file_path).upload_from_string(product_substitution.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
-
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
-
-            # Write a query sample
-            query_file_path: str = "queries/get_product_substitution_from_mystique.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
-
-            # Read big query into pd.DataFrame
-            product_substitution_temp: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            product_substitution: pd.DataFrame = pd.DataFrame(columns=product_substitution_temp.columns)
-
-            # Filter product substitutes with better margin
-            region_base_prd_pairs: List[Tuple[str]] = list(set(zip(product_substitution_temp["region"], product_substitution_temp["produk_awal"])))
-
-            for region, base_prd in region_base_prd_pairs:
-                # If there is product with lower margin, we will ignore these products
-                sub_product_substitution: pd.DataFrame = product_substitution_temp[(product_substitution_temp["region"] == region) & (product_substitution_temp["produk_awal"] == base_prd)]
-                if False in sub_product_substitution["is_better_margin"].unique():
-                    sub_product_substitution[["produk_substitusi", "pemasok_produk_substitusi", "harga_produk_substitusi", "bahan_aktif_substitusi"]] = None
-
-                product_substitution: pd.DataFrame = pd.concat([product_substitution, sub_product_substitution])
-
-            # Structurize the corresponding table
-            product_substitution["produk_awal"] = product_substitution["produk_awal"].apply(lambda product: product.upper().strip() if type(product) == str else None)
-            product_substitution["produk_substitusi"] = product_substitution["produk_substitusi"].apply(lambda product: product.upper().strip() if type(product) == str else None)
-            product_substitution.reset_index(drop=True, inplace=True)
-            gcs.get_blob(file_path).upload_from_string(product_substitution.to_csv(index=False), "text/csv")
+    product_substitution: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="product_substitution",
+        query_file_path="queries/get_product_substitutes_from_mystique.sql",
+        transform=filter_better_margin_substitutes
+    )
+
+    # Key base and substitute products by product id
+    product_substitution = get_product_dictionary(gcs).encode(
+        product_substitution,
+        {"produk_awal": "produk_awal_id", "produk_substitusi": "produk_substitusi_id"}
+    )
 
     return product_substitution
 
@@ -468,52 +421,13 @@ def get_product_candidates(
         product_candidates: pd.DataFrame
             product candidates
     """
-    try:
-        file_path: str = "datasets/product_candidates.csv"
-        gsutil_uri: str = f"gs://{gcs.bucket_name}/{file_path}" 
-        product_candidates: pd.DataFrame = pd.read_csv(gsutil_uri)
-
-    except (HttpError, FileNotFoundError):
-        cr_acc: CredentialAccessor = CredentialAccessor(
-            env=gcs.env,
-            on_server=gcs.on_server
-        )
-
-        big_query: GoogleBigQuery = GoogleBigQuery(
-            attr=cr_acc.get_attr()
-        )
-
-        # Write a query sample
-        query_file_path: str = "queries/get_big_frac_gmv_products.sql"
-        with open(query_file_path) as query_file:
-            sample_query = query_file.read()
-
-        # Read big query into pd.DataFrame
-        product_candidates: pd.DataFrame = big_query.gbq_read(query=sample_query)
-        gcs.get_blob(file_path).upload_from_string(product_candidates.to_csv(index=False), "text/csv")
-
-    else:
-        # Compare file created date with current date
-        file_created_date: datetime.date = gcs.get_file_created_date(file_path)
-        current_date: datetime.date = datetime.today().date()
-
-        if file_created_date != current_date:
-            cr_acc: CredentialAccessor = CredentialAccessor(
-                env=gcs.env,
-                on_server=gcs.on_server
-            )
+    product_candidates: pd.DataFrame = load_dataset(
+        gcs=gcs,
+        dataset_name="product_candidates",
+        query_file_path="queries/get_big_frac_gmv_products.sql"
+    )
 
-            big_query: GoogleBigQuery = GoogleBigQuery(
-                attr=cr_acc.get_attr()
-            )
-
-            # Write a query sample
-            query_file_path: str = "queries/get_big_frac_gmv_products.sql"
-            with open(query_file_path) as query_file:
-                sample_query = query_file.read()
-
-            # Read big query into pd.DataFrame
-            product_candidates: pd.DataFrame = big_query.gbq_read(query=sample_query)
-            gcs.get_blob(file_path).upload_from_string(product_candidates.to_csv(index=False), "text/csv")
+    # Normalize product name, and key it by product id
+    product_candidates = get_product_dictionary(gcs).encode(product_candidates, {"nama_produk": "produk_id"})
 
-    return product_candidates
\ No newline at end of file
+    return product_candidates
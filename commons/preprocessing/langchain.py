@@ -3,6 +3,7 @@ from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_google_genai._common import GoogleGenerativeAIError
 from commons.prompt.examples import examples
 from commons.prompt.templates import answer_template
+from commons.sqlite.query_rewriter import rewrite_composite_key_lookup
 from langchain_community.vectorstores import FAISS
 from langchain_core.example_selectors import SemanticSimilarityExampleSelector
 from langchain_core.prompts import FewShotPromptTemplate, PromptTemplate
@@ -171,6 +172,7 @@ def clean_query(
     Returns
     ----------
         standardized_query: str
-            standardize query, to anticipate `LIKE` operation of query
+            standardize query, to anticipate `LIKE` operation of query and lookup by concatenated key
     """
-    return query.replace("`", "").replace("sql", "").replace("SQLQuery: ", "").strip().lower()
+    standardized_query: str = query.replace("`", "").replace("sql", "").replace("SQLQuery: ", "").strip().lower()
+    return rewrite_composite_key_lookup(standardized_query)
@@ -0,0 +1,99 @@
+import abc
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+
+PartitionKey = Tuple[str, str]
+
+class PartitionedData(Mapping):
+    """
+    Context enrichment data partitioned per (table_category, metric_category).
+    Indexing follows a nested dict, ex.: data["product_recom"]["rekomendasi_produk"],
+    and a partition is only materialized when it is accessed.
+    """
+    @abc.abstractmethod
+    def partition_keys(self) -> List[PartitionKey]:
+        """
+        List all (table_category, metric_category) pairs
+
+        Returns
+        ----------
+            keys: List[Tuple[str, str]]
+                pairs of table category and metric category
+        """
+
+    @abc.abstractmethod
+    def get_partition(self, table_category: str, metric_category: str) -> pd.DataFrame:
+        """
+        Materialize a partition
+
+        Parameters
+        ----------
+            table_category: str
+                specified table category
+
+            metric_category: str
+                specified metric category
+
+        Returns
+        ----------
+            partition: pd.DataFrame
+                all rows of the partition
+        """
+
+    def __getitem__(self, table_category: str) -> Mapping:
+        metric_categories: List[str] = [metric for table, metric in self.partition_keys() if table == table_category]
+        if not metric_categories:
+            raise KeyError(table_category)
+
+        return _TableCategoryView(self, table_category, metric_categories)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(dict.fromkeys(table for table, _ in self.partition_keys()))
+
+    def __len__(self) -> int:
+        return len(set(table for table, _ in self.partition_keys()))
+
+class _TableCategoryView(Mapping):
+    def __init__(self, data: PartitionedData, table_category: str, metric_categories: List[str]):
+        self.data = data
+        self.table_category = table_category
+        self.metric_categories = metric_categories
+
+    def __getitem__(self, metric_category: str) -> pd.DataFrame:
+        if metric_category not in self.metric_categories:
+            raise KeyError(metric_category)
+
+        return self.data.get_partition(self.table_category, metric_category)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.metric_categories)
+
+    def __len__(self) -> int:
+        return len(self.metric_categories)
+
+class GroupedPartitions(PartitionedData):
+    def __init__(self, data: pd.DataFrame):
+        """
+        Partitions of an in-memory frame, computed in one grouped pass.
+        Only row positions are kept per partition, rows are copied when a partition is first accessed.
+
+        Parameters
+        ----------
+            data: pd.DataFrame
+                context enrichment data, with `table_category` and `metric_category` columns
+        """
+        self.data = data
+        self._indices: Dict[PartitionKey, np.ndarray] = data.groupby(["table_category", "metric_category"], sort=False).indices
+        self._materialized: Dict[PartitionKey, pd.DataFrame] = dict()
+
+    def partition_keys(self) -> List[PartitionKey]:
+        return list(self._indices)
+
+    def get_partition(self, table_category: str, metric_category: str) -> pd.DataFrame:
+        key: PartitionKey = (table_category, metric_category)
+        if key not in self._materialized:
+            self._materialized[key] = self.data.take(self._indices[key]).reset_index(drop=True)
+
+        return self._materialized[key]
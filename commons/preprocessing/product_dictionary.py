@@ -0,0 +1,178 @@
+import json
+import threading
+import pandas as pd
+from typing import Dict, List, Optional
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+
+PRODUCT_DICTIONARY_PATH: str = "datasets/_product_dictionary.json"
+
+def normalize_product_name(
+    product_names: pd.Series
+) -> pd.Series:
+    """
+    Normalize product names to be upper-cased and stripped, non-string values become None.
+
+    Parameters
+    ----------
+        product_names: pd.Series
+            specified product names
+
+    Returns
+    ----------
+        normalized_product_names: pd.Series
+            normalized product names
+    """
+    product_names = product_names.astype(object)
+    is_string: pd.Series = product_names.map(type) == str
+    return product_names.where(is_string).str.upper().str.strip().astype(object).where(is_string, None)
+
+class ProductDictionary:
+    def __init__(self, gcs: GoogleCloudStorage):
+        """
+        Dictionary of normalized product names, stored as 'datasets/_product_dictionary.json'.
+        A product id is the position of its name in the dictionary, names are only appended,
+        so an id never changes once it is assigned, and ids equal codes of `get_dtype()` categoricals.
+
+        Parameters
+        ----------
+            gcs: GoogleCloudStorage
+                Google Cloud Storage object
+        """
+        self.gcs = gcs
+        self.names: List[str] = list()
+        self.ids: Dict[str, int] = dict()
+        self.generation: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> "ProductDictionary":
+        """
+        Read the dictionary from Google Cloud Storage, an empty dictionary if it doesn't exist yet
+
+        Returns
+        ----------
+            product_dictionary: ProductDictionary
+                this dictionary
+        """
+        blob = self.gcs.get_blob(PRODUCT_DICTIONARY_PATH)
+
+        try:
+            content: bytes = blob.download_as_bytes()
+
+        except NotFound:
+            self.names, self.generation = list(), 0
+
+        else:
+            self.names, self.generation = json.loads(content), blob.generation
+
+        self.ids = {name: product_id for product_id, name in enumerate(self.names)}
+        return self
+
+    def intern(self, product_names: pd.Series) -> None:
+        """
+        Assign ids to new normalized product names, then write the dictionary.
+        The write is conditional on dictionary's generation, so concurrent writers append after each other's names.
+
+        Parameters
+        ----------
+            product_names: pd.Series
+                normalized product names, missing values are ignored
+        """
+        with self._lock:
+            while True:
+                new_names: List[str] = [name for name in product_names.dropna().unique() if name not in self.ids]
+                if not new_names:
+                    return
+
+                try:
+                    blob = self.gcs.get_blob(PRODUCT_DICTIONARY_PATH)
+                    blob.upload_from_string(json.dumps(self.names + new_names), "application/json", if_generation_match=self.generation)
+
+                except PreconditionFailed:
+                    # Other writer has appended names, assign ids after theirs
+                    self.load()
+
+                else:
+                    self.ids.update({name: len(self.names) + position for position, name in enumerate(new_names)})
+                    self.names.extend(new_names)
+                    self.generation = blob.generation
+                    return
+
+    def get_dtype(self) -> pd.CategoricalDtype:
+        """
+        Obtain categorical dtype of product names, whose codes are product ids
+
+        Returns
+        ----------
+            dtype: pd.CategoricalDtype
+                categories of all interned product names, in order of product id
+        """
+        return pd.CategoricalDtype(self.names)
+
+    def encode(self, data: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+        """
+        Normalize product name columns into categoricals, and add their integer product id columns
+
+        Parameters
+        ----------
+            data: pd.DataFrame
+                specified data
+
+            columns: Dict[str, str]
+                product name columns mapped to their product id columns (ex.: {'nama_produk': 'produk_id'})
+
+        Returns
+        ----------
+            encoded_data: pd.DataFrame
+                data with categorical product names, and nullable integer product ids
+        """
+        data = data.copy()
+        for name_column in columns:
+            data[name_column] = normalize_product_name(data[name_column])
+
+        # Intern names of all columns at once, so the dictionary is written once
+        self.intern(pd.concat([data[name_column] for name_column in columns], ignore_index=True))
+
+        dtype: pd.CategoricalDtype = self.get_dtype()
+        for name_column, id_column in columns.items():
+            data[name_column] = data[name_column].astype(dtype)
+            codes: pd.Series = pd.Series(data[name_column].cat.codes, index=data.index)
+            data[id_column] = codes.where(codes >= 0).astype("Int64")
+
+        return data
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Obtain the dictionary as a table
+
+        Returns
+        ----------
+            products: pd.DataFrame
+                columns `produk_id` and `nama_produk`, one row per product
+        """
+        return pd.DataFrame({"produk_id": range(len(self.names)), "nama_produk": self.names})
+
+_product_dictionaries: Dict[str, ProductDictionary] = dict()
+_product_dictionaries_lock = threading.Lock()
+
+def get_product_dictionary(
+    gcs: GoogleCloudStorage
+) -> ProductDictionary:
+    """
+    Obtain the product dictionary of a bucket, read once per process
+
+    Parameters
+    ----------
+        gcs: GoogleCloudStorage
+            Google Cloud Storage object
+
+    Returns
+    ----------
+        product_dictionary: ProductDictionary
+            dictionary of product names
+    """
+    with _product_dictionaries_lock:
+        if gcs.bucket_name not in _product_dictionaries:
+            _product_dictionaries[gcs.bucket_name] = ProductDictionary(gcs).load()
+
+        return _product_dictionaries[gcs.bucket_name]
@@ -1,9 +1,52 @@
+import os
+import math
+import multiprocessing
 import numpy as np
 import pandas as pd
-from typing import List
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
 from datetime import datetime, date
+from pandas.tseries.frequencies import to_offset
 from dateutil.relativedelta import relativedelta
 
+# Estimators of purchase probability
+PURCHASE_PROB_METHODS: List[str] = ["simulation", "closed_form"]
+
+# Frequencies whose periods are labeled by their end when resampled (ex.: weekly, month end)
+END_LABELED_FREQS: List[str] = ["W", "ME", "M", "QE", "Q", "YE", "Y", "A", "BME", "BM", "BQE", "BQ", "BYE", "BY", "BA"]
+
+def get_window_start(
+    start_dt: date,
+    end_dt: date,
+    min_months: int = 6
+) -> date:
+    """
+    Obtain start date of a time series window, which spans at least `min_months` months up to `end_dt`
+
+    Parameters
+    ----------
+        start_dt: date
+            date of the first period with data
+
+        end_dt: date
+            end date of the window (ex.: today)
+
+        min_months: int
+            minimum length of the window, in months
+
+    Returns
+    ----------
+        start_dt: date
+            start date of the window
+    """
+    # Check the months of difference between two dates
+    month_diff: relativedelta = relativedelta(end_dt, start_dt)
+    if month_diff.years * 12 + month_diff.months <= min_months:
+        start_dt: date = end_dt - relativedelta(months=min_months)
+
+    return start_dt
+
 def get_freq_time_series_data(
     data: pd.DataFrame | pd.Series,
     columns_to_show: List[str],
@@ -39,13 +82,8 @@ def get_freq_time_series_data(
     freq_data: pd.DataFrame = data.resample(freq).sum()
     
     # Initialize start and end date
-    start_dt: date = freq_data.index[0].date()
     end_dt: date = datetime.today().date()
-
-    # Check the months of difference between two dates
-    month_diff: int = relativedelta(end_dt, start_dt).months
-    if month_diff <= 6:
-        start_dt: date = end_dt - relativedelta(months=6)
+    start_dt: date = get_window_start(freq_data.index[0].date(), end_dt)
 
     # Assign indexes for later
     freq_data_indexes: pd.DatetimeIndex = pd.date_range(
@@ -64,19 +102,115 @@ def get_freq_time_series_data(
     freq_data.fillna(0, inplace=True)
     return freq_data
 
+def get_freq_time_series_matrix(
+    data: pd.DataFrame,
+    key_columns: List[str],
+    date_col: str,
+    column_to_observe: str,
+    freq: str,
+    end_dt: date = None
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, pd.DatetimeIndex]:
+    """
+    Resample many series at once onto a shared calendar up to today, like `get_freq_time_series_data` does per series.
+    Each series is a right-aligned row of a dense (series x periods) array: its window ends on the last period of the calendar,
+    and starts `length` periods before, at its first period with data or at least six months before `end_dt`.
+    Periods before a series' window are zero.
+
+    Parameters
+    ----------
+        data: pd.DataFrame
+            long-format data, with `key_columns`, `date_col`, and `column_to_observe` columns
+
+        key_columns: List[str]
+            columns identifying a series (ex.: ['mitra_id', 'nama_produk'])
+
+        date_col: str
+            date column contained in `data`
+
+        column_to_observe: str
+            column to be summed per period
+
+        freq: str
+            frequency strings
+
+        end_dt: date
+            last date of the calendar, default to today
+
+    Returns
+    ----------
+        keys: pd.DataFrame
+            `key_columns` of each series, in sorted order
+
+        freq_matrix: np.ndarray
+            sum of `column_to_observe` per (series, period), missing periods are zero
+
+        lengths: np.ndarray
+            number of periods in each series' window
+
+        calendar: pd.DatetimeIndex
+            periods of the shared calendar
+    """
+    end_dt = datetime.today().date() if end_dt is None else end_dt
+
+    # Series are numbered in order of their keys
+    series_ids: np.ndarray = data.groupby(key_columns, sort=True).ngroup().to_numpy()
+    data = data[series_ids >= 0]
+    series_ids = series_ids[series_ids >= 0]
+    num_series: int = int(series_ids.max()) + 1 if len(series_ids) else 0
+    dates: pd.Series = pd.to_datetime(data[date_col]).dt.normalize()
+
+    # Like `resample`, end-anchored frequencies label a period by its end, the others by its start
+    offset: pd.DateOffset = to_offset(freq)
+    is_labeled_by_end: bool = offset.rule_code.split("-")[0] in END_LABELED_FREQS
+
+    # Shared calendar covers the earliest window, periods of a date are found by binary search on it
+    earliest_dt: date = min(dates.min().date(), end_dt) if len(dates) else end_dt
+    earliest_dt = earliest_dt if is_labeled_by_end else offset.rollback(pd.Timestamp(earliest_dt)).date()
+    calendar: pd.DatetimeIndex = pd.date_range(start=min(earliest_dt, end_dt - relativedelta(months=6)), end=end_dt, freq=freq)
+    if is_labeled_by_end:
+        periods: np.ndarray = np.searchsorted(calendar.to_numpy(), dates.to_numpy(), side="left")
+    else:
+        periods: np.ndarray = np.searchsorted(calendar.to_numpy(), dates.to_numpy(), side="right") - 1
+        periods[dates.to_numpy() >= (calendar[-1] + offset).to_datetime64()] = len(calendar)
+
+    # Window of each series starts at its first period with data, or six months before `end_dt`
+    first_periods: np.ndarray = np.full(num_series, len(calendar), dtype=np.int64)
+    np.minimum.at(first_periods, series_ids, periods)
+    start_periods: np.ndarray = first_periods.copy()
+    for first_period in np.unique(first_periods):
+        # Series whose first period is after `end_dt` only get the minimum window
+        first_dt: date = calendar[first_period].date() if first_period < len(calendar) else end_dt
+        window_start: date = get_window_start(first_dt, end_dt)
+        start_periods[first_periods == first_period] = np.searchsorted(calendar.to_numpy(), np.datetime64(window_start), side="left")
+
+    # Sum values into their (series, period) cells, dropping those outside the window
+    is_in_window: np.ndarray = (periods < len(calendar)) & (periods >= start_periods[series_ids])
+    cells: np.ndarray = series_ids[is_in_window] * len(calendar) + periods[is_in_window]
+    values: np.ndarray = data[column_to_observe].to_numpy(dtype=float)[is_in_window]
+    freq_matrix: np.ndarray = np.bincount(cells, weights=values, minlength=num_series * len(calendar)).reshape(num_series, len(calendar))
+
+    # Keys of each series are taken from its first row
+    first_positions: np.ndarray = np.unique(series_ids, return_index=True)[1]
+    keys: pd.DataFrame = data.iloc[first_positions][key_columns].reset_index(drop=True)
+    lengths: np.ndarray = len(calendar) - start_periods
+
+    return keys, freq_matrix, lengths, calendar
+
 def special_monte_carlo_simulation(
-    time_series_data: pd.Series,
+    time_series_data: pd.Series | np.ndarray,
     n_size: int,
     n_simulation: int,
-    param_scale: float = 1
-) -> List[float]:
+    param_scale: float = 1,
+    rng: np.random.Generator = None
+) -> np.ndarray:
     """
     Generate samples from Monte Carlo Simulation on Time-Series Indexes, with prior distribution of Exponential.
+    All simulations are drawn at once, as rows of a (n_simulation, n_size) array.
 
     Parameters
     ----------
-        time_series_data: pd.Series
-            specified time-series data, with corresponding frequency. It must be pandas.Series
+        time_series_data: pd.Series | np.ndarray
+            specified time-series data, with corresponding frequency
         
         n_size: int
             number of sample size
@@ -87,44 +221,277 @@ def special_monte_carlo_simulation(
         param_scale: float
             The scale parameter. Must be non-negative
 
+        rng: np.random.Generator
+            random number generator, a fresh unseeded generator if not specified
+
     Returns
     ----------
-        mean_samples: List[float]
-            samples generated from 'Special' Monte Carlo Simulation
+        mean_samples: np.ndarray
+            samples generated from 'Special' Monte Carlo Simulation, one per simulation
     """
-    # Save the sample mean in here
-    mean_samples: List[float] = []
+    rng = np.random.default_rng() if rng is None else rng
+    values: np.ndarray = np.asarray(time_series_data, dtype=float)
 
+    # We will chose prior distribution to be Exponential, one row per simulation
+    random_samples: np.ndarray = rng.exponential(scale=param_scale, size=(n_simulation, n_size))
 
-    for _ in range(n_simulation):
+    # Standardize the samples of each simulation to have a range of (0, 1)
+    samples_min: np.ndarray = random_samples.min(axis=1, keepdims=True)
+    samples_max: np.ndarray = random_samples.max(axis=1, keepdims=True)
+    standardized_samples: np.ndarray = (random_samples - samples_min) / (samples_max - samples_min)
 
-        # We will chose prior distribution to be Exponential
-        random_samples: np.ndarray = np.random.exponential(scale=param_scale, size=n_size)
+    # Give a magnitude of length to standardized_samples, as positions counted from the end
+    num_locs: np.ndarray = np.floor(standardized_samples * (n_size - 1)).astype(int) + 1
 
-        # Standardize the samples to have a range of (0, 1)
-        min_max_scaling = lambda x: (x - random_samples.min()) / (random_samples.max() - random_samples.min())
-        standardized_samples: np.ndarray = np.vectorize(min_max_scaling)(random_samples)
+    # Get real samples, corresponding to sampled labels
+    converted_samples: np.ndarray = values[len(values) - num_locs]
 
-        # Give a magnitude of length to standardized_samples
-        standardized_samples: np.ndarray = np.floor(standardized_samples * (n_size - 1)) + 1
-        standardized_samples = standardized_samples.astype(int)
+    # Calculate mean and variance of each simulation
+    converted_samples_mean: np.ndarray = converted_samples.mean(axis=1)
+    converted_samples_std: np.ndarray = converted_samples.std(axis=1)
 
-        # Get real samples, corresponding to sampled labels
-        converted_samples: List[float] = [time_series_data.iloc[-num_loc] for num_loc in standardized_samples]
-        
-        # Calculate mean and variance from the sample
-        converted_samples_mean: float = np.mean(converted_samples)
-        converted_samples_std: float = np.std(converted_samples)
-
-        # Generate random mean sample (Central Limit Theorem)
-        mean_sample: float = np.random.normal(
-            loc=converted_samples_mean,
-            scale=converted_samples_std
+    # Generate random mean samples (Central Limit Theorem)
+    mean_samples: np.ndarray = rng.normal(loc=converted_samples_mean, scale=converted_samples_std)
+    return mean_samples
+
+def get_wilson_interval(
+    successes: int,
+    n_trials: int,
+    confidence: float = 0.95
+) -> Tuple[float, float]:
+    """
+    Obtain Wilson score interval of a binomial proportion, which stays valid for proportions near 0 or 1
+
+    Parameters
+    ----------
+        successes: int
+            number of successes
+
+        n_trials: int
+            number of trials
+
+        confidence: float
+            confidence level of the interval
+
+    Returns
+    ----------
+        lower_bound: float
+            lower bound of the proportion
+
+        upper_bound: float
+            upper bound of the proportion
+    """
+    z: float = NormalDist().inv_cdf(0.5 + confidence / 2)
+    proportion: float = successes / n_trials
+
+    center: float = (proportion + z ** 2 / (2 * n_trials)) / (1 + z ** 2 / n_trials)
+    margin: float = z * np.sqrt(proportion * (1 - proportion) / n_trials + z ** 2 / (4 * n_trials ** 2)) / (1 + z ** 2 / n_trials)
+    return center - margin, center + margin
+
+def estimate_purchase_prob(
+    time_series_data: pd.Series | np.ndarray,
+    n_size: int,
+    n_simulation: int,
+    param_scale: float = 1,
+    rng: np.random.Generator = None,
+    tolerance: float = None,
+    block_size: int = 1_000,
+    confidence: float = 0.95
+) -> Tuple[float, int]:
+    """
+    Estimate purchase probability, P(mean sample > 0), by Monte Carlo Simulation.
+    If `tolerance` is specified, simulations run in blocks of `block_size`, and stop as soon as
+    Wilson interval of the probability is narrower than `tolerance`, or `n_simulation` is reached.
+
+    Parameters
+    ----------
+        time_series_data: pd.Series | np.ndarray
+            specified time-series data, with corresponding frequency
+
+        n_size: int
+            number of sample size
+
+        n_simulation: int
+            number of simulation, the maximum one if `tolerance` is specified
+
+        param_scale: float
+            The scale parameter. Must be non-negative
+
+        rng: np.random.Generator
+            random number generator, a fresh unseeded generator if not specified
+
+        tolerance: float
+            maximum width of the probability's interval, all `n_simulation` are run if not specified
+
+        block_size: int
+            number of simulation per block
+
+        confidence: float
+            confidence level of the interval
+
+    Returns
+    ----------
+        purchase_prob: float
+            probability of purchase, ranged from 0 to 1
+
+        n_simulation_used: int
+            number of simulation which are run
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    block_size = n_simulation if tolerance is None else block_size
+
+    successes: int = 0
+    n_simulation_used: int = 0
+    while n_simulation_used < n_simulation:
+        mean_samples: np.ndarray = special_monte_carlo_simulation(
+            time_series_data=time_series_data,
+            n_size=n_size,
+            n_simulation=min(block_size, n_simulation - n_simulation_used),
+            param_scale=param_scale,
+            rng=rng
         )
+        successes += int(np.sum(mean_samples > 0))
+        n_simulation_used += len(mean_samples)
 
-        mean_samples.append(mean_sample)
+        # Stop once the probability has converged, series without any purchase converge in the first block
+        if tolerance is not None:
+            lower_bound, upper_bound = get_wilson_interval(successes, n_simulation_used, confidence)
+            if upper_bound - lower_bound <= tolerance:
+                break
 
-    return mean_samples
+    return successes / n_simulation_used, n_simulation_used
+
+def get_index_weights(
+    n_size: int
+) -> np.ndarray:
+    """
+    Obtain probability of each position (counted from the end) to be sampled by `special_monte_carlo_simulation`.
+    Minimum of an exponential sample always maps to the last period, and maximum to the first one.
+    The other samples, minus the minimum, are exponential too and scaled by the range, which is approximated by
+    its expectation H(n - 1) (harmonic number), so their positions follow a truncated exponential distribution.
+
+    Parameters
+    ----------
+        n_size: int
+            number of sample size
+
+    Returns
+    ----------
+        index_weights: np.ndarray
+            probability of positions 1, ..., n_size counted from the end (position 1 is the last period)
+    """
+    if n_size <= 2:
+        return np.full(n_size, 1 / n_size)
+
+    harmonic_number: float = np.sum(1 / np.arange(1, n_size))
+    bin_edges: np.ndarray = np.exp(-harmonic_number * np.arange(n_size) / (n_size - 1))
+    interior_weights: np.ndarray = (bin_edges[:-1] - bin_edges[1:]) / (bin_edges[0] - bin_edges[-1])
+
+    index_weights: np.ndarray = np.zeros(n_size)
+    index_weights[:-1] = interior_weights * (n_size - 2) / n_size
+    index_weights[0] += 1 / n_size
+    index_weights[-1] += 1 / n_size
+    return index_weights
+
+def normal_cdf(
+    x: np.ndarray
+) -> np.ndarray:
+    """
+    Cumulative distribution function of the standard normal distribution, vectorized.
+    Uses erf approximation 7.1.26 of Abramowitz and Stegun (absolute error below 1.5e-7).
+
+    Parameters
+    ----------
+        x: np.ndarray
+            specified values, may be infinite
+
+    Returns
+    ----------
+        probs: np.ndarray
+            P(Z <= x)
+    """
+    t_values: np.ndarray = np.abs(x) / math.sqrt(2)
+    t: np.ndarray = 1 / (1 + 0.3275911 * t_values)
+    polynomial: np.ndarray = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    with np.errstate(over="ignore"):
+        erf_values: np.ndarray = 1 - polynomial * np.exp(-t_values ** 2)
+    return 0.5 * (1 + np.sign(x) * erf_values)
+
+def closed_form_purchase_probs(
+    freq_matrix: np.ndarray,
+    lengths: np.ndarray
+) -> np.ndarray:
+    """
+    Estimate purchase probability of many series like `special_monte_carlo_simulation` would, without random draws.
+    Given its sample, a mean sample is normal, so P(mean sample > 0) = Phi(sample mean / sample std).
+    The sample is summarized by its number of non-zero periods j: the last and first periods are always sampled,
+    the other n - 2 positions are independent draws (see `get_index_weights`), so j follows a shifted binomial.
+    With weighted mean m and second moment s2 of non-zero periods, and p = j / n, the ratio is sqrt(p) m / sqrt(s2 - p m^2).
+    It is exact for series whose non-zero periods are equal, ex.: buy one or not.
+
+    Parameters
+    ----------
+        freq_matrix: np.ndarray
+            right-aligned series, see `get_freq_time_series_matrix`
+
+        lengths: np.ndarray
+            number of periods in each series' window
+
+    Returns
+    ----------
+        purchase_probs: np.ndarray
+            purchase probability of each series, NaN if its window is empty
+    """
+    freq_matrix = np.atleast_2d(freq_matrix)
+    purchase_probs: np.ndarray = np.full(len(lengths), np.nan)
+
+    # Series of the same length share their weights
+    for n_size in np.unique(lengths[lengths > 0]):
+        n_size: int = int(n_size)
+        is_same_length: np.ndarray = lengths == n_size
+        index_weights: np.ndarray = get_index_weights(n_size)
+
+        # Position k counted from the end is column -k
+        values: np.ndarray = freq_matrix[is_same_length][:, ::-1][:, :n_size]
+        is_nonzero: np.ndarray = values != 0
+
+        # Weighted moments of non-zero periods
+        nonzero_weights: np.ndarray = is_nonzero @ index_weights
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nonzero_mean: np.ndarray = (values @ index_weights) / nonzero_weights
+            nonzero_moment: np.ndarray = ((values ** 2) @ index_weights) / nonzero_weights
+
+        # Number of non-zero periods in a sample, last and first periods are always in it
+        num_fixed: np.ndarray = is_nonzero[:, 0].astype(int) + (is_nonzero[:, -1].astype(int) if n_size > 1 else 0)
+        num_draws: int = max(n_size - 2, 0)
+        if num_draws > 0:
+            interior_weights: np.ndarray = index_weights.copy()
+            interior_weights[[0, -1]] -= 1 / n_size
+            nonzero_rate: np.ndarray = np.clip((is_nonzero @ interior_weights) * n_size / num_draws, 0, 1)
+            draw_counts: np.ndarray = np.arange(num_draws + 1)
+            log_binomial: np.ndarray = np.array([math.lgamma(num_draws + 1) - math.lgamma(i + 1) - math.lgamma(num_draws - i + 1) for i in draw_counts])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_pmf: np.ndarray = (
+                    log_binomial
+                    + np.where(draw_counts > 0, draw_counts * np.log(nonzero_rate[:, None]), 0)
+                    + np.where(draw_counts < num_draws, (num_draws - draw_counts) * np.log1p(-nonzero_rate[:, None]), 0)
+                )
+            count_pmf: np.ndarray = np.exp(log_pmf)
+        else:
+            count_pmf: np.ndarray = np.ones((len(values), 1))
+
+        # Probability of mean sample > 0 for each number of non-zero periods, none means every sample is zero
+        nonzero_counts: np.ndarray = num_fixed[:, None] + np.arange(count_pmf.shape[1])
+        proportions: np.ndarray = nonzero_counts / n_size
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sample_std: np.ndarray = np.sqrt(np.clip(proportions * nonzero_moment[:, None] - (proportions * nonzero_mean[:, None]) ** 2, 0, None))
+            z_scores: np.ndarray = proportions * nonzero_mean[:, None] / sample_std
+        z_scores = np.where(sample_std > 0, z_scores, np.where(proportions * nonzero_mean[:, None] > 0, np.inf, -np.inf))
+        conditional_probs: np.ndarray = np.where(nonzero_counts > 0, normal_cdf(np.nan_to_num(z_scores, nan=-np.inf)), 0)
+
+        purchase_probs[is_same_length] = np.sum(count_pmf * conditional_probs, axis=1)
+
+    return purchase_probs
 
 def calculate_purchase_prob(
     # PARAMETERS OF `get_freq_time_series_data`
@@ -136,7 +503,10 @@ def calculate_purchase_prob(
     # PARAMETERS OF `special_monte_carlo_simulation`
     column_to_observe: str,
     n_simulation: int,
-    param_scale: float = 1
+    param_scale: float = 1,
+    rng: np.random.Generator = None,
+    tolerance: float = None,
+    method: str = "simulation"
 ) -> float:
     """
     Calculate purchase probability, started from: 
@@ -167,14 +537,23 @@ def calculate_purchase_prob(
         param_scale: float
             The scale parameter. Must be non-negative
 
-        epsilon: float
-            give lower bound to our threshold
+        rng: np.random.Generator
+            random number generator, a fresh unseeded generator if not specified
+
+        tolerance: float
+            stop simulating once interval of the probability is narrower than this, see `estimate_purchase_prob`
+
+        method: str
+            'simulation' (Monte Carlo Simulation) or 'closed_form' (no random draws, see `closed_form_purchase_probs`)
 
     Returns
     ----------
         purchase_prob: float
             probability of purchase, ranged from 0 to 1
     """
+    if method not in PURCHASE_PROB_METHODS:
+        raise ValueError("[ERROR] Unknown method `{}`, choose one of {}".format(method, PURCHASE_PROB_METHODS))
+
     # Obtain data with frequency-based index
     freq_data: pd.DataFrame = get_freq_time_series_data(
         data=data,
@@ -185,13 +564,187 @@ def calculate_purchase_prob(
 
     # Obtain samples from Monte Carlo Simulation
     n_size: int = len(freq_data)
-    mean_samples: List[float] = special_monte_carlo_simulation(
+    if method == "closed_form":
+        return float(closed_form_purchase_probs(freq_data[column_to_observe].to_numpy(dtype=float), np.array([n_size]))[0])
+
+    purchase_prob, _ = estimate_purchase_prob(
         time_series_data=freq_data[column_to_observe],
         n_size=n_size,
         n_simulation=n_simulation,
-        param_scale=param_scale
+        param_scale=param_scale,
+        rng=rng,
+        tolerance=tolerance
+    )
+
+    return purchase_prob
+
+def _calculate_purchase_prob_chunk(
+    freq_matrix: np.ndarray,
+    lengths: np.ndarray,
+    series_ids: np.ndarray,
+    n_simulation: int,
+    param_scale: float,
+    entropy: int,
+    tolerance: float = None,
+    block_size: int = 1_000
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate purchase probability of every series in a chunk, each with its own random stream.
+    Stream of a series only depends on `entropy` and its series id, not on chunk nor worker.
+
+    Parameters
+    ----------
+        freq_matrix: np.ndarray
+            right-aligned series of the chunk, see `get_freq_time_series_matrix`
+
+        lengths: np.ndarray
+            number of periods in each series' window
+
+        series_ids: np.ndarray
+            id of each series
+
+        n_simulation: int
+            number of simulation per series
+
+        param_scale: float
+            The scale parameter. Must be non-negative
+
+        entropy: int
+            entropy of the root seed sequence
+
+        tolerance: float
+            stop simulating a series once interval of its probability is narrower than this
+
+        block_size: int
+            number of simulation per block, if `tolerance` is specified
+
+    Returns
+    ----------
+        purchase_probs: np.ndarray
+            purchase probability of each series, NaN if its window is empty
+
+        n_simulations_used: np.ndarray
+            number of simulation which are run for each series
+    """
+    purchase_probs: np.ndarray = np.full(len(series_ids), np.nan)
+    n_simulations_used: np.ndarray = np.zeros(len(series_ids), dtype=np.int64)
+    for position, (row, length, series_id) in enumerate(zip(freq_matrix, lengths, series_ids)):
+        if length == 0:
+            continue
+
+        rng: np.random.Generator = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(int(series_id),)))
+        purchase_probs[position], n_simulations_used[position] = estimate_purchase_prob(
+            time_series_data=row[len(row) - length:],
+            n_size=int(length),
+            n_simulation=n_simulation,
+            param_scale=param_scale,
+            rng=rng,
+            tolerance=tolerance,
+            block_size=block_size
+        )
+
+    return purchase_probs, n_simulations_used
+
+def calculate_purchase_probs(
+    transactions: pd.DataFrame,
+    key_columns: List[str],
+    date_col: str,
+    column_to_observe: str,
+    freq: str,
+    n_simulation: int,
+    param_scale: float = 1,
+    seed: int = None,
+    chunk_size: int = 1_000,
+    max_workers: int = None,
+    tolerance: float = None,
+    block_size: int = 1_000,
+    method: str = "simulation"
+) -> pd.DataFrame:
+    """
+    Calculate purchase probability of every series of a long-format transaction table (ex.: per mitra and product).
+    All series are resampled in one pass, then chunked across a process pool. Every series draws from its own stream
+    spawned from `seed`, so probabilities don't depend on chunk size nor number of workers.
+
+    Parameters
+    ----------
+        transactions: pd.DataFrame
+            long-format transactions, with `key_columns`, `date_col`, and `column_to_observe` columns
+
+        key_columns: List[str]
+            columns identifying a series (ex.: ['mitra_id', 'nama_produk'])
+
+        date_col: str
+            date column contained in `transactions`
+
+        column_to_observe: str
+            quantity column contained in `transactions`
+
+        freq: str
+            frequency strings
+
+        n_simulation: int
+            number of simulation per series, the maximum one if `tolerance` is specified
+
+        param_scale: float
+            The scale parameter. Must be non-negative
+
+        seed: int
+            root seed, fresh entropy if not specified
+
+        chunk_size: int
+            number of series per chunk
+
+        max_workers: int
+            number of processes, number of CPUs if not specified. Chunks are processed in this process if it is 1
+
+        tolerance: float
+            stop simulating a series once interval of its probability is narrower than this, see `estimate_purchase_prob`
+
+        block_size: int
+            number of simulation per block, if `tolerance` is specified
+
+        method: str
+            'simulation' (Monte Carlo Simulation) or 'closed_form' (no random draws, computed in this process)
+
+    Returns
+    ----------
+        purchase_probs: pd.DataFrame
+            `key_columns`, `purchase_prob`, and `n_simulation_used`, one row per series
+    """
+    if method not in PURCHASE_PROB_METHODS:
+        raise ValueError("[ERROR] Unknown method `{}`, choose one of {}".format(method, PURCHASE_PROB_METHODS))
+
+    entropy: int = np.random.SeedSequence(seed).entropy
+
+    # Series are numbered in order of their keys
+    purchase_probs, freq_matrix, lengths, _ = get_freq_time_series_matrix(
+        data=transactions,
+        key_columns=key_columns,
+        date_col=date_col,
+        column_to_observe=column_to_observe,
+        freq=freq
     )
 
-    # Calculate the Purchase probability
-    purchase_prob: float = np.mean(np.array(mean_samples) > 0)
-    return purchase_prob
\ No newline at end of file
+    if method == "closed_form":
+        purchase_probs["purchase_prob"] = closed_form_purchase_probs(freq_matrix, lengths)
+        purchase_probs["n_simulation_used"] = 0
+        return purchase_probs
+
+    series_ids: np.ndarray = np.arange(len(purchase_probs))
+    chunk_args: List[tuple] = [
+        (freq_matrix[start:start + chunk_size], lengths[start:start + chunk_size], series_ids[start:start + chunk_size], n_simulation, param_scale, entropy, tolerance, block_size)
+        for start in range(0, len(series_ids), chunk_size)
+    ]
+
+    max_workers = min(max_workers or os.cpu_count(), max(len(chunk_args), 1))
+    if max_workers == 1:
+        chunk_results: List[Tuple[np.ndarray, np.ndarray]] = [_calculate_purchase_prob_chunk(*args) for args in chunk_args]
+
+    else:
+        # Processes are spawned, since forking a process with running threads and open connections is unsafe
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            chunk_results: List[Tuple[np.ndarray, np.ndarray]] = list(executor.map(_calculate_purchase_prob_chunk, *zip(*chunk_args)))
+
+    purchase_probs["purchase_prob"] = np.concatenate([probs for probs, _ in chunk_results]) if chunk_results else np.array([], dtype=float)
+    purchase_probs["n_simulation_used"] = np.concatenate([n_used for _, n_used in chunk_results]) if chunk_results else np.array([], dtype=np.int64)
+    return purchase_probs
@@ -0,0 +1,123 @@
+import os
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.preprocessing.context_enrichment import get_product_recommendation, DEFAULT_TOP_K
+from commons.preprocessing.product_dictionary import ProductDictionary, get_product_dictionary
+
+def shard_by_region(
+    product_recommendation: pd.DataFrame,
+    detail_mitra: pd.DataFrame,
+    smrm_data: pd.DataFrame,
+    gmv_data: pd.DataFrame,
+    regions: List[str] = None
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Split inputs of `get_product_recommendation` by region of mitra, so every shard can be preprocessed on its own.
+    A shard holds context enrichment rows and GMV of its region's mitra, and SMRM of its region.
+
+    Parameters
+    ----------
+        product_recommendation: pd.DataFrame
+            raw data about product recommendation from context enrichment
+
+        detail_mitra: pd.DataFrame
+            data regarding to detail mitra, with `mitra_id` and `region_mitra` columns
+
+        smrm_data: pd.DataFrame
+            SMRM data
+
+        gmv_data: pd.DataFrame
+            GMV data
+
+        regions: List[str]
+            regions to be processed, all regions of `detail_mitra` if not specified
+
+    Returns
+    ----------
+        shards: Dict[str, Dict[str, pd.DataFrame]]
+            pairs of region and its inputs, keyed by argument name of `get_product_recommendation`
+    """
+    regions = sorted(detail_mitra["region_mitra"].dropna().unique()) if regions is None else regions
+
+    shards: Dict[str, Dict[str, pd.DataFrame]] = dict()
+    for region, region_detail_mitra in detail_mitra[detail_mitra["region_mitra"].isin(regions)].groupby("region_mitra", sort=True):
+        region_mitra_ids: pd.Series = region_detail_mitra["mitra_id"]
+        shards[region] = {
+            "product_recommendation": product_recommendation[product_recommendation["mitra_id"].isin(region_mitra_ids)],
+            "detail_mitra": region_detail_mitra,
+            "smrm_data": smrm_data[smrm_data["region"] == region],
+            "gmv_data": gmv_data[gmv_data["mitra_id"].isin(region_mitra_ids)]
+        }
+
+    return shards
+
+def get_product_recommendation_by_region(
+    product_recommendation: pd.DataFrame,
+    detail_mitra: pd.DataFrame,
+    gcs: GoogleCloudStorage,
+    smrm_data: pd.DataFrame,
+    gmv_data: pd.DataFrame,
+    top_k: int = DEFAULT_TOP_K,
+    regions: List[str] = None,
+    max_workers: int = None
+) -> pd.DataFrame:
+    """
+    Obtain product recommendation data like `get_product_recommendation`, with every region preprocessed in its own process.
+    Shards' outputs are merged in order of mitra, as a single process would return them.
+
+    Parameters
+    ----------
+        product_recommendation: pd.DataFrame
+            raw data about product recommendation from context enrichment
+
+        detail_mitra: pd.DataFrame
+            data regarding to detail mitra, with `mitra_id` and `region_mitra` columns
+
+        gcs: GoogleCloudStorage
+            an instance of Google Cloud Storage
+
+        smrm_data: pd.DataFrame
+            SMRM data
+
+        gmv_data: pd.DataFrame
+            GMV data
+
+        top_k: int
+            number of products kept per mitra
+
+        regions: List[str]
+            regions to be processed, all regions of `detail_mitra` if not specified
+
+        max_workers: int
+            number of processes, number of CPUs if not specified
+
+    Returns
+    ----------
+        product_recommendation: pd.DataFrame
+            structured product recommendation data of the processed regions
+    """
+    shards: Dict[str, Dict[str, pd.DataFrame]] = shard_by_region(product_recommendation, detail_mitra, smrm_data, gmv_data, regions=regions)
+    if not shards:
+        raise ValueError("[ERROR] No mitra in regions: {}".format(regions))
+
+    # Processes are spawned, since forking a process with running threads and open connections is unsafe
+    max_workers = min(max_workers or os.cpu_count(), len(shards))
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures: Dict[str, Future] = {
+            region: executor.submit(get_product_recommendation, gcs=gcs, top_k=top_k, **shard)
+            for region, shard in shards.items()
+        }
+        shard_outputs: List[pd.DataFrame] = [futures[region].result() for region in shards]
+
+    product_recommendation = pd.concat(shard_outputs, ignore_index=True)
+    product_recommendation = product_recommendation.sort_values("mitra_id", kind="stable", ignore_index=True)
+
+    # Products interned by shards are read back, so product names share the dictionary's categories again
+    product_dictionary: ProductDictionary = get_product_dictionary(gcs)
+    product_dictionary.intern(product_recommendation["nama_produk"].astype(object))
+    product_recommendation["nama_produk"] = product_recommendation["nama_produk"].astype(object).astype(product_dictionary.get_dtype())
+
+    return product_recommendation
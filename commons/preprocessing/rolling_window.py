@@ -0,0 +1,207 @@
+import pandas as pd
+from typing import List
+from datetime import datetime, date, timedelta
+from dateutil.relativedelta import relativedelta
+from google.cloud.exceptions import NotFound
+from dao.google_bigquery import GoogleBigQuery
+from commons.checkpoint.google_cloud_console import GoogleCloudStorage
+from commons.checkpoint.dataset_format import PARQUET_CONTENT_TYPE, get_checkpoint_path, read_parquet_bytes, to_parquet_bytes
+
+# Number of latest complete days queried again on every update, orders completed (or costs corrected) late land on past days
+DEFAULT_REFETCH_DAYS: int = 7
+
+class RollingWindowAggregate:
+    def __init__(
+        self,
+        name: str,
+        query_file_path: str,
+        key_columns: List[str],
+        value_columns: List[str],
+        window_months: int = 2,
+        date_col: str = "trx_date",
+        refetch_days: int = DEFAULT_REFETCH_DAYS
+    ):
+        """
+        Store of daily partial sums over a rolling window, checkpointed in Google Cloud Storage.
+        Each update only queries the days which are not stored yet, the latest `refetch_days` complete days, and today's incomplete day,
+        then drops the days which have left the window.
+
+        Parameters
+        ----------
+            name: str
+                name of store, checkpointed as 'datasets/rolling/<name>.parquet'
+
+            query_file_path: str
+                query of daily partial sums, formatted with `start_date` and `end_date` (inclusive)
+
+            key_columns: List[str]
+                columns to aggregate on, besides `date_col`
+
+            value_columns: List[str]
+                additive columns of partial sums
+
+            window_months: int
+                length of rolling window in months
+
+            date_col: str
+                date column of daily partial sums
+
+            refetch_days: int
+                number of latest complete days queried again on every update, replacing their stored partial sums
+        """
+        self.name = name
+        self.query_file_path = query_file_path
+        self.key_columns = key_columns
+        self.value_columns = value_columns
+        self.window_months = window_months
+        self.date_col = date_col
+        self.refetch_days = refetch_days
+        self.file_path = get_checkpoint_path(f"rolling/{name}")
+
+    def get_window_start(self, current_date: date) -> date:
+        """
+        Obtain first date of rolling window
+
+        Parameters
+        ----------
+            current_date: datetime.date
+                last date of rolling window
+
+        Returns
+        ----------
+            window_start: datetime.date
+                first date of rolling window
+        """
+        return current_date - relativedelta(months=self.window_months)
+
+    def fetch(self, big_query: GoogleBigQuery, start_date: date, end_date: date, use_cache: bool = True) -> pd.DataFrame:
+        """
+        Query daily partial sums between two dates (inclusive)
+
+        Parameters
+        ----------
+            big_query: GoogleBigQuery
+                Google Big Query object
+
+            start_date: datetime.date
+                first date to query
+
+            end_date: datetime.date
+                last date to query
+
+            use_cache: bool
+                whether the result may be served from the query cache, only for days which won't change anymore
+
+        Returns
+        ----------
+            partials: pd.DataFrame
+                daily partial sums
+        """
+        with open(self.query_file_path) as query_file:
+            query: str = query_file.read().format(start_date=start_date.isoformat(), end_date=end_date.isoformat())
+
+        partials: pd.DataFrame = big_query.gbq_read_arrow(query=query, use_cache=use_cache)
+        partials[self.date_col] = pd.to_datetime(partials[self.date_col])
+        return partials
+
+    def load(self, gcs: GoogleCloudStorage) -> pd.DataFrame:
+        """
+        Load stored daily partial sums
+
+        Parameters
+        ----------
+            gcs: GoogleCloudStorage
+                Google Cloud Storage object
+
+        Returns
+        ----------
+            partials: pd.DataFrame
+                stored daily partial sums, empty if there is no store yet
+        """
+        try:
+            return read_parquet_bytes(gcs.get_blob(self.file_path).download_as_bytes())
+
+        except NotFound:
+            partials: pd.DataFrame = pd.DataFrame(columns=[self.date_col] + self.key_columns + self.value_columns)
+            return partials.astype({self.date_col: "datetime64[ns]"})
+
+    def update(self, gcs: GoogleCloudStorage, big_query: GoogleBigQuery, current_date: date = None) -> pd.DataFrame:
+        """
+        Shift the window to current date, querying only the missing days and the latest `refetch_days` complete days
+
+        Parameters
+        ----------
+            gcs: GoogleCloudStorage
+                Google Cloud Storage object
+
+            big_query: GoogleBigQuery
+                Google Big Query object
+
+            current_date: datetime.date
+                last date of rolling window, default to current date of Google Big Query (UTC)
+
+        Returns
+        ----------
+            partials: pd.DataFrame
+                daily partial sums of the whole window, including today's incomplete day
+        """
+        current_date: date = current_date or datetime.utcnow().date()
+        window_start: date = self.get_window_start(current_date)
+        last_complete_date: date = current_date - timedelta(days=1)
+        refetch_start: date = max(current_date - timedelta(days=self.refetch_days), window_start)
+
+        # Drop the expired days, and the latest complete days which may still change
+        partials: pd.DataFrame = self.load(gcs)
+        partials = partials[(partials[self.date_col].dt.date >= window_start) & (partials[self.date_col].dt.date < refetch_start)]
+
+        # Only complete days are stored, so the days after the latest kept day are missing
+        stored_dates: pd.Series = partials[self.date_col].dt.date
+        fetch_start: date = window_start if partials.empty else max(stored_dates.max() + timedelta(days=1), window_start)
+
+        if fetch_start <= last_complete_date:
+            # Re-fetched days may have changed since the last update, so they aren't served from the query cache
+            new_partials: pd.DataFrame = self.fetch(big_query, fetch_start, last_complete_date, use_cache=self.refetch_days == 0)
+            partials = pd.concat([partials, new_partials], ignore_index=True)
+
+            gcs.get_blob(self.file_path).upload_from_string(to_parquet_bytes(partials), PARQUET_CONTENT_TYPE)
+            print("Update rolling window \"{name}\": {start} - {end}".format(name=self.name, start=fetch_start, end=last_complete_date))
+
+        # Today's day is still incomplete, so it is always queried and never stored
+        today_partials: pd.DataFrame = self.fetch(big_query, current_date, current_date, use_cache=False)
+        return pd.concat([partials, today_partials], ignore_index=True)
+
+    def aggregate(self, partials: pd.DataFrame, key_columns: List[str] = None) -> pd.DataFrame:
+        """
+        Sum daily partial sums over the window
+
+        Parameters
+        ----------
+            partials: pd.DataFrame
+                daily partial sums
+
+            key_columns: List[str]
+                columns to aggregate on, default to store's key columns
+
+        Returns
+        ----------
+            window_sums: pd.DataFrame
+                sums over the window, per key
+        """
+        key_columns: List[str] = key_columns or self.key_columns
+        return partials.groupby(key_columns, as_index=False, sort=False, dropna=False)[self.value_columns].sum()
+
+# Daily GMV per (mitra_id, nama_produk)
+gmv_window: RollingWindowAggregate = RollingWindowAggregate(
+    name="gmv_daily",
+    query_file_path="queries/get_product_gmv_daily.sql",
+    key_columns=["mitra_id", "nama_produk"],
+    value_columns=["gmv"]
+)
+
+# Daily SMRM and COGS per (region, nama_produk), `mitra_id` is kept to filter today's mitra
+smrm_window: RollingWindowAggregate = RollingWindowAggregate(
+    name="smrm_daily",
+    query_file_path="queries/get_smrm_products_daily.sql",
+    key_columns=["mitra_id", "region", "nama_produk"],
+    value_columns=["smrm", "cogs"]
+)
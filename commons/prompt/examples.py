@@ -10,8 +10,8 @@ rekomendasi_produk_related: List[dict] = [
         "query": """
         select produk_substitusi, produk_awal, is_better_margin, harga_produk_substitusi, pemasok_produk_substitusi, pemasok_produk_awal, bahan_aktif_produk_substitusi, bahan_aktif_produk_awal
         from substitusi_produk 
-        where region || '_' || produk_awal in (
-            select detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk
+        where (region, produk_awal) in (
+            select detail_mitra.region_mitra, rekomendasi_produk.nama_produk
             from detail_mitra
             inner join rekomendasi_produk on rekomendasi_produk.mitra_id = detail_mitra.mitra_id
             where detail_mitra.mitra_id = 32516
@@ -23,8 +23,8 @@ rekomendasi_produk_related: List[dict] = [
         "query": """
         select produk_substitusi, produk_awal, is_better_margin, harga_produk_substitusi, pemasok_produk_substitusi, pemasok_produk_awal, bahan_aktif_produk_substitusi, bahan_aktif_produk_awal
         from substitusi_produk 
-        where region || '_' || produk_awal in (
-            select detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk
+        where (region, produk_awal) in (
+            select detail_mitra.region_mitra, rekomendasi_produk.nama_produk
             from detail_mitra
             inner join rekomendasi_produk on rekomendasi_produk.mitra_id = detail_mitra.mitra_id
             where detail_mitra.mitra_id = 49291
@@ -36,8 +36,8 @@ rekomendasi_produk_related: List[dict] = [
         "query": """
         select produk_substitusi, produk_awal, is_better_margin, harga_produk_substitusi, pemasok_produk_substitusi, pemasok_produk_awal, bahan_aktif_produk_substitusi, bahan_aktif_produk_awal
         from substitusi_produk 
-        where region || '_' || produk_awal in (
-            select detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk
+        where (region, produk_awal) in (
+            select detail_mitra.region_mitra, rekomendasi_produk.nama_produk
             from detail_mitra
             inner join rekomendasi_produk on rekomendasi_produk.mitra_id = detail_mitra.mitra_id
             where detail_mitra.mitra_id = 46465
@@ -46,10 +46,24 @@ rekomendasi_produk_related: List[dict] = [
     }
 ]
 
+# Examples: Purchase probability
+probabilitas_pembelian_related: List[dict] = [
+    {
+        "input": "Produk apa saja yang paling mungkin dibeli lagi oleh Sinergi Tani dengan mitra id 32516",
+        "query": """
+        select nama_produk, probabilitas_pembelian
+        from probabilitas_pembelian
+        where mitra_id = 32516
+        order by probabilitas_pembelian desc
+        limit 5
+        """
+    }
+]
+
 # Examples: Promo Coupon
 kupon_promo_related: List[dict] = []
 
 # Examples: Transaction Summarized
 ringkasan_transaksi_related: List[dict] = []
 
-examples: List[dict] = detail_mitra_related + rekomendasi_produk_related + kupon_promo_related + ringkasan_transaksi_related
\ No newline at end of file
+examples: List[dict] = detail_mitra_related + rekomendasi_produk_related + probabilitas_pembelian_related + kupon_promo_related + ringkasan_transaksi_related
\ No newline at end of file
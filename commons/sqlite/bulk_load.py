@@ -0,0 +1,176 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+
+# Pragmas for rebuilding the database from scratch: no rollback journal nor fsync, and a 256 MB page cache.
+# A crash while loading leaves a broken file, which is rebuilt by the next run anyway.
+BULK_LOAD_PRAGMAS: List[str] = [
+    "PRAGMA journal_mode = OFF;",
+    "PRAGMA synchronous = OFF;",
+    "PRAGMA cache_size = -262144;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA locking_mode = EXCLUSIVE;"
+]
+
+# Number of rows per `executemany` call
+BULK_LOAD_BATCH_SIZE: int = 50_000
+
+def get_column_type(
+    column: pd.Series
+) -> str:
+    """
+    Obtain SQL type of a column, nullable integers (ex.: product ids) are integers and categoricals are text
+
+    Parameters
+    ----------
+        column: pd.Series
+            specified column
+
+    Returns
+    ----------
+        column_type: str
+            SQL type of the column
+    """
+    if pd.api.types.is_bool_dtype(column.dtype):
+        return "BOOLEAN"
+
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return "INTEGER"
+
+    if pd.api.types.is_float_dtype(column.dtype):
+        return "FLOAT"
+
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        return "DATETIME"
+
+    return "VARCHAR(100)"
+
+def get_column_values(
+    column: pd.Series
+) -> List[Any]:
+    """
+    Convert a column into Python values accepted by sqlite3, missing values become None
+
+    Parameters
+    ----------
+        column: pd.Series
+            specified column
+
+    Returns
+    ----------
+        values: List[Any]
+            values of the column
+    """
+    if pd.api.types.is_bool_dtype(column.dtype) and not column.hasnans:
+        return column.astype(np.int64).tolist()
+
+    if pd.api.types.is_datetime64_any_dtype(column.dtype):
+        column = column.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    elif (pd.api.types.is_integer_dtype(column.dtype) or pd.api.types.is_float_dtype(column.dtype)) and not column.hasnans:
+        # Plain numpy columns are converted at once
+        return column.to_numpy().tolist()
+
+    values: pd.Series = column.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+def bulk_load_table(
+    connection: sqlite3.Connection,
+    table_name: str,
+    data: pd.DataFrame,
+    batch_size: int = BULK_LOAD_BATCH_SIZE
+) -> None:
+    """
+    (Re)create a table and insert all of its rows within one transaction, in batches built from column arrays
+
+    Parameters
+    ----------
+        connection: sqlite3.Connection
+            connection to SQLite database, whose pragmas are already set
+
+        table_name: str
+            name of table
+
+        data: pd.DataFrame
+            rows of the table
+
+        batch_size: int
+            number of rows per `executemany` call
+    """
+    column_definitions: str = ", ".join('"{}" {}'.format(column, get_column_type(data[column])) for column in data.columns)
+    placeholders: str = ", ".join("?" * len(data.columns))
+    column_values: List[List[Any]] = [get_column_values(data[column]) for column in data.columns]
+
+    cursor: sqlite3.Cursor = connection.cursor()
+    cursor.execute("BEGIN;")
+    try:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
+        cursor.execute(f"CREATE TABLE {table_name} ({column_definitions});")
+
+        for start in range(0, len(data), batch_size):
+            cursor.executemany(
+                f"INSERT INTO {table_name} VALUES ({placeholders});",
+                zip(*[values[start:start + batch_size] for values in column_values])
+            )
+
+        cursor.execute("COMMIT;")
+
+    except Exception:
+        cursor.execute("ROLLBACK;")
+        raise
+
+def bulk_load(
+    database_name: str,
+    data_dict: Dict[str, pd.DataFrame],
+    queries: Dict[str, List[str]] = None,
+    final_queries: List[str] = None,
+    batch_size: int = BULK_LOAD_BATCH_SIZE
+) -> None:
+    """
+    Load tables into a SQLite database with bulk-load pragmas, one transaction per table.
+    Queries of each table (ex.: indexes) are run after every table is loaded, so rows are inserted without maintaining indexes.
+
+    Parameters
+    ----------
+        database_name: str
+            path of SQLite database
+
+        data_dict: Dict[str, pd.DataFrame]
+            pairs of table name and its rows
+
+        queries: Dict[str, List[str]]
+            queries of each table, run only if the table is loaded
+
+        final_queries: List[str]
+            queries run after queries of every table (ex.: 'ANALYZE;')
+
+        batch_size: int
+            number of rows per `executemany` call
+    """
+    # Transactions are managed explicitly
+    connection: sqlite3.Connection = sqlite3.connect(database_name, isolation_level=None)
+
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            connection.execute(pragma)
+
+        for table_name, data in data_dict.items():
+            bulk_load_table(connection, table_name, data, batch_size=batch_size)
+            print("Create table \"{table_name}\"".format(table_name=table_name))
+
+        # Deferred queries of loaded tables (ex.: index creation), all at once
+        connection.execute("BEGIN;")
+        for table_name, table_queries in (queries or dict()).items():
+            if table_name not in data_dict:
+                continue
+
+            for query in table_queries:
+                connection.execute(query)
+        connection.execute("COMMIT;")
+
+        for query in final_queries or []:
+            connection.execute(query)
+
+    finally:
+        connection.close()
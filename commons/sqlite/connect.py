@@ -1,10 +1,7 @@
 from langchain_community.utilities import SQLDatabase
-from sqlalchemy import create_engine
-from sqlalchemy.types import *
-from typing import List
 from commons.checkpoint.google_cloud_console import GoogleCloudStorage
-import sqlite3
-import pandas as pd
+from commons.sqlite.bulk_load import bulk_load
+from commons.sqlite.queries import queries, analyze_queries
 import os
 
 DATABASE_URI: str = 'sqlite:///context_enrichment.db'
@@ -66,35 +63,8 @@ def connect_to_sqlite(
         db: SQLDatabase
             SQLAlchemy Engine to SQLite
     """
-    # Create SQL engine
-    engine = create_engine(DATABASE_URI)
-
-    # Establish a connection with SQLite database server
-    sqlite_connection = sqlite3.connect(DATABASE_NAME)
-    cursor = sqlite_connection.cursor()
-
-    # Load CSV file as a table of database
-    for table_name in data_dict:
-        # Drop specific table
-        cursor.execute(f"DROP TABLE IF EXISTS {table_name};")
-
-        # Assign the data to be sent into database
-        df: pd.DataFrame = data_dict[table_name]
-        df_schema = {column: (Boolean if df[column].dtype == "bool" else Integer if df[column].dtype == "int" else (String(100) if df[column].dtype == 'O' else Float)) for column in df.columns}
-
-        # Write records stored in a DataFrame to a SQL database.
-        df.to_sql(
-            name=table_name, # name of SQL table
-            con=engine, # SQLAlchemy engine
-            index=False,
-            if_exists="replace",
-            dtype=df_schema
-        )
-
-        print("Create table \"{table_name}\"".format(table_name=table_name))
-    
-    # Close the connection
-    sqlite_connection.close()
+    # Load every table in bulk, then index them and collect statistics for the query planner
+    bulk_load(DATABASE_NAME, data_dict, queries=queries, final_queries=analyze_queries)
 
     # Return SQLAlchemy Engine
     db = construct_sql_engine(DATABASE_URI, DATABASE_NAME, gcs_obj=gcs_obj)
@@ -0,0 +1,40 @@
+from typing import Dict, List
+
+# List of queries that will be run after each table is loaded
+produk_queries: List[str] = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_produk_produk_id ON produk (produk_id);'
+]
+
+detail_mitra_queries: List[str] = [
+    'CREATE INDEX IF NOT EXISTS idx_detail_mitra_mitra_id ON detail_mitra (mitra_id);'
+]
+
+rekomendasi_produk_queries: List[str] = [
+    'CREATE INDEX IF NOT EXISTS idx_rekomendasi_produk_mitra_id ON rekomendasi_produk (mitra_id);'
+]
+
+substitusi_produk_queries: List[str] = [
+    'CREATE INDEX IF NOT EXISTS idx_substitusi_produk_region_produk_awal ON substitusi_produk (region, produk_awal);'
+]
+
+kandidat_produk_queries: List[str] = [
+    'CREATE INDEX IF NOT EXISTS idx_kandidat_produk_cluster ON kandidat_produk (cluster);'
+]
+
+probabilitas_pembelian_queries: List[str] = [
+    'CREATE INDEX IF NOT EXISTS idx_probabilitas_pembelian_mitra_id_produk_id ON probabilitas_pembelian (mitra_id, produk_id);'
+]
+
+queries: Dict[str, List[str]] = {
+    "produk": produk_queries,
+    "detail_mitra": detail_mitra_queries,
+    "rekomendasi_produk": rekomendasi_produk_queries,
+    "substitusi_produk": substitusi_produk_queries,
+    "kandidat_produk": kandidat_produk_queries,
+    "probabilitas_pembelian": probabilitas_pembelian_queries
+}
+
+# Statistics for the query planner, collected once every index exists
+analyze_queries: List[str] = [
+    'ANALYZE;'
+]
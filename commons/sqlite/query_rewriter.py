@@ -0,0 +1,60 @@
+import re
+from typing import List
+
+# Concatenation of columns with a literal separator, ex.: `region || '_' || produk_awal`
+CONCATENATED_KEY: str = r"[\w.]+(?:\s*\|\|\s*'[^']*'\s*\|\|\s*[\w.]+)+"
+CONCATENATED_KEY_SEPARATOR_PATTERN: re.Pattern = re.compile(r"\s*\|\|\s*'[^']*'\s*\|\|\s*")
+
+# Lookup by concatenated key, ex.: `region || '_' || produk_awal in (select a || '_' || b ...)`
+COMPOSITE_KEY_LOOKUP_PATTERN: re.Pattern = re.compile(
+    r"(?<![\w.'])(?P<key>" + CONCATENATED_KEY + r")\s+(?P<operator>(?:not\s+)?in)\s*\(\s*select\s+(?P<selected_key>" + CONCATENATED_KEY + r")"
+)
+
+def split_concatenated_key(
+    key: str
+) -> List[str]:
+    """
+    Split a concatenated key into its columns
+
+    Parameters
+    ----------
+        key: str
+            concatenated key (ex.: "region || '_' || produk_awal")
+
+    Returns
+    ----------
+        columns: List[str]
+            columns of the key (ex.: ["region", "produk_awal"])
+    """
+    return CONCATENATED_KEY_SEPARATOR_PATTERN.split(key)
+
+def rewrite_composite_key_lookup(
+    query: str
+) -> str:
+    """
+    Rewrite lookup by concatenated key into lookup by row value, so SQLite searches the composite index (ex.: on `(region, produk_awal)`)
+    instead of scanning the whole table and concatenating every row.
+    Only keys of exactly two columns on both sides are rewritten, any other lookup is left unchanged.
+
+    Parameters
+    ----------
+        query: str
+            response's query
+
+    Returns
+    ----------
+        rewritten_query: str
+            query with `a || '_' || b [not] in (select c || '_' || d ...)` rewritten as `(a, b) [not] in (select c, d ...)`
+    """
+    def rewrite(match: re.Match) -> str:
+        key: List[str] = split_concatenated_key(match.group("key"))
+        selected_key: List[str] = split_concatenated_key(match.group("selected_key"))
+
+        # The key mustn't be a part of a longer concatenation
+        is_concatenated: bool = query[:match.start()].rstrip().endswith("||") or query[match.end():].lstrip().startswith("||")
+        if is_concatenated or len(key) != 2 or len(selected_key) != 2:
+            return match.group(0)
+
+        return "({}) {} (select {}".format(", ".join(key), match.group("operator"), ", ".join(selected_key))
+
+    return COMPOSITE_KEY_LOOKUP_PATTERN.sub(rewrite, query)
@@ -1,14 +1,24 @@
 from google.cloud import bigquery as bq
+from google.cloud import bigquery_storage as bqs
 from google.cloud.exceptions import NotFound as NF
-from google.oauth2.service_account import Credentials as Cr
 from pandas import DataFrame as df
 from pandas_gbq import read_gbq
 from time import time as t
+from typing import Iterator
+from dao.query_cache import QueryResultCache, query_cache as shared_query_cache
+import pyarrow as pa
+import os
+
+# Maximum bytes processed by a single query, no limit if not specified
+QUERY_MAX_BYTES_PROCESSED = os.getenv("QUERY_MAX_BYTES_PROCESSED")
 
 class GoogleBigQuery():
     def __init__(
         self,
         attr : dict,
+        query_cache : QueryResultCache = shared_query_cache,
+        max_bytes_processed : int = None,
+        client : bq.client.Client = None,
         *args, **kwargs
     ) -> None:
         """ 
@@ -17,6 +27,9 @@ class GoogleBigQuery():
             
             Arguments:
             . attr -> dictionary of attributes, including on_server, env, project_id, etc.
+            . query_cache -> cache of query results, used by reads with use_cache=True
+            . max_bytes_processed -> budget of a single query, checked with a dry run before the query runs
+            . client -> already built BigQuery client to be shared, built on first use if None
             
             Info:
             . Last edited by: NICHOLAS DOMINIC <nicholas.dominic@agriaku.com>
@@ -26,6 +39,12 @@ class GoogleBigQuery():
         
         super(GoogleBigQuery, self).__init__()
         self.attr = attr
+        self.query_cache = query_cache
+        self.max_bytes_processed = max_bytes_processed if max_bytes_processed is not None else (
+            int(QUERY_MAX_BYTES_PROCESSED) if QUERY_MAX_BYTES_PROCESSED else None
+        )
+        self._client = client
+        self._storage_client = None
         
     def gbq_client(
         self,
@@ -39,10 +58,32 @@ class GoogleBigQuery():
             . None
         """
         
-        return bq.Client(
-            project=self.attr["project_id"],
-            credentials=self.attr["cred_sa"]
-        )
+        if self._client is None:
+            self._client = bq.Client(
+                project=self.attr["project_id"],
+                credentials=self.attr["cred_sa"]
+            )
+
+        return self._client
+    
+    def gbq_storage_client(
+        self,
+        *args, **kwargs
+    ) -> bqs.BigQueryReadClient:
+        """ 
+            Usage:
+            To get a Google BigQuery Storage Read API client.
+            
+            Arguments:
+            . None
+        """
+        
+        if self._storage_client is None:
+            self._storage_client = bqs.BigQueryReadClient(
+                credentials=self.attr["cred_sa"]
+            )
+
+        return self._storage_client
     
     def gbq_check_table(
         self,
@@ -67,9 +108,54 @@ class GoogleBigQuery():
             print("[ERROR] Table not found: {}".format(table_name))
             return False
     
+    def gbq_dry_run(
+        self,
+        query : str,
+        *args, **kwargs
+    ) -> int:
+        """ 
+            Usage:
+            To estimate bytes processed by a query, without running it.
+            
+            Arguments:
+            . query -> SQL query
+        """
+        
+        job = self.gbq_client().query(
+            query,
+            job_config=bq.QueryJobConfig(dry_run=True, use_query_cache=False),
+            location=self.attr["loc"]
+        )
+
+        print("[INFO] Query will process {:.2f} GB.".format(job.total_bytes_processed / 1024 ** 3))
+        return job.total_bytes_processed
+    
+    def gbq_check_budget(
+        self,
+        query : str,
+        *args, **kwargs
+    ) -> None:
+        """ 
+            Usage:
+            To refuse a query which processes more bytes than `max_bytes_processed`.
+            
+            Arguments:
+            . query -> SQL query
+        """
+        
+        if self.max_bytes_processed is None:
+            return
+
+        bytes_processed = self.gbq_dry_run(query)
+        if bytes_processed > self.max_bytes_processed:
+            raise ValueError("[ERROR] Query will process {} bytes, exceeding the budget of {} bytes.".format(
+                bytes_processed, self.max_bytes_processed)
+            )
+    
     def gbq_read(
         self,
         query : str,
+        use_cache : bool = False,
         *args, **kwargs
     ) -> df:
         """ 
@@ -77,15 +163,161 @@ class GoogleBigQuery():
             To read a BigQuery table and return it as a Pandas Dataframe.
             
             Arguments:
-            . None
+            . query -> SQL query
+            . use_cache -> whether to serve the result from (and store it into) the query cache
         """
         
-        return read_gbq(
+        if use_cache:
+            dataframe = self.query_cache.get(query)
+            if dataframe is not None:
+                return dataframe
+
+        self.gbq_check_budget(query)
+        dataframe = read_gbq(
             query,
             project_id=self.attr["project_id"], 
             location=self.attr["loc"], 
-            credentials=Cr.from_service_account_file(self.attr["cred_path"])
+            credentials=self.attr["cred_sa"],
+            use_bqstorage_api=True
+        )
+
+        if use_cache:
+            self.query_cache.put(query, dataframe)
+
+        return dataframe
+    
+    def gbq_read_session(
+        self,
+        query : str = None,
+        table : str = None,
+        columns : list = None,
+        row_filter : str = None,
+        max_stream_count : int = 1,
+        *args, **kwargs
+    ) -> bqs.types.ReadSession:
+        """ 
+            Usage:
+            To open a Storage Read API session on a BigQuery table or query result.
+            The session holds the Arrow schema, even if there is no row to read.
+            
+            Arguments:
+            . query -> SQL query, its result (temporary table) will be read. Either `query` or `table` is required
+            . table -> table to be read, written as "project.dataset.table" or "dataset.table"
+            . columns -> list of columns to be read, all columns if None
+            . row_filter -> SQL predicate to filter rows on server side (ex.: "region = 'Jabar'")
+            . max_stream_count -> maximum number of streams, 1 keeps the rows ordered
+        """
+        
+        if (query is None) == (table is None):
+            raise ValueError("[ERROR] Either `query` or `table` should be specified.")
+
+        if query is not None:
+            # Run the query, then read its destination table
+            self.gbq_check_budget(query)
+            job = self.gbq_client().query(query, location=self.attr["loc"])
+            job.result()
+            table_ref = job.destination
+        else:
+            table_ref = bq.TableReference.from_string(table, default_project=self.attr["project_id"])
+
+        read_options = bqs.types.ReadSession.TableReadOptions(
+            selected_fields=columns or [],
+            row_restriction=row_filter or ""
+        )
+        return self.gbq_storage_client().create_read_session(
+            parent="projects/{}".format(self.attr["project_id"]),
+            read_session=bqs.types.ReadSession(
+                table="projects/{}/datasets/{}/tables/{}".format(table_ref.project, table_ref.dataset_id, table_ref.table_id),
+                data_format=bqs.types.DataFormat.ARROW,
+                read_options=read_options
+            ),
+            max_stream_count=max_stream_count
         )
+
+    def gbq_read_session_batches(
+        self,
+        read_session : bqs.types.ReadSession
+    ) -> Iterator[pa.RecordBatch]:
+        """ 
+            Usage:
+            To stream the rows of a Storage Read API session as Arrow record batches.
+            
+            Arguments:
+            . read_session -> session opened by `gbq_read_session`
+        """
+        
+        for stream in read_session.streams:
+            reader = self.gbq_storage_client().read_rows(stream.name)
+            for page in reader.rows(read_session).pages:
+                yield page.to_arrow()
+
+    def gbq_read_batches(
+        self,
+        query : str = None,
+        table : str = None,
+        columns : list = None,
+        row_filter : str = None,
+        max_stream_count : int = 1,
+        *args, **kwargs
+    ) -> Iterator[pa.RecordBatch]:
+        """ 
+            Usage:
+            To stream a BigQuery table or query result as Arrow record batches, through the Storage Read API.
+            
+            Arguments:
+            . query -> SQL query, its result (temporary table) will be read. Either `query` or `table` is required
+            . table -> table to be read, written as "project.dataset.table" or "dataset.table"
+            . columns -> list of columns to be read, all columns if None
+            . row_filter -> SQL predicate to filter rows on server side (ex.: "region = 'Jabar'")
+            . max_stream_count -> maximum number of streams, 1 keeps the rows ordered
+        """
+        
+        read_session = self.gbq_read_session(query=query, table=table, columns=columns, row_filter=row_filter, max_stream_count=max_stream_count)
+        yield from self.gbq_read_session_batches(read_session)
+    
+    def gbq_read_arrow(
+        self,
+        query : str = None,
+        table : str = None,
+        columns : list = None,
+        row_filter : str = None,
+        use_cache : bool = False,
+        *args, **kwargs
+    ) -> df:
+        """ 
+            Usage:
+            To read a BigQuery table or query result as a Pandas Dataframe, through the Storage Read API.
+            Arrow buffers are released while being converted, so the data is not held twice.
+            An empty result keeps the columns (and types) of the table.
+            
+            Arguments:
+            . query -> SQL query, its result (temporary table) will be read. Either `query` or `table` is required
+            . table -> table to be read, written as "project.dataset.table" or "dataset.table"
+            . columns -> list of columns to be read, all columns if None
+            . row_filter -> SQL predicate to filter rows on server side (ex.: "region = 'Jabar'")
+            . use_cache -> whether to serve the result of `query` from (and store it into) the query cache
+        """
+        
+        use_cache = use_cache and query is not None and columns is None and row_filter is None
+        if use_cache:
+            dataframe = self.query_cache.get(query)
+            if dataframe is not None:
+                return dataframe
+
+        read_session = self.gbq_read_session(query=query, table=table, columns=columns, row_filter=row_filter)
+        batches = list(self.gbq_read_session_batches(read_session))
+        if batches:
+            arrow_table = pa.Table.from_batches(batches)
+        else:
+            # Without any stream, only the session's schema tells the columns
+            arrow_table = pa.ipc.read_schema(pa.py_buffer(read_session.arrow_schema.serialized_schema)).empty_table()
+        del batches
+
+        dataframe = arrow_table.to_pandas(self_destruct=True, split_blocks=True)
+        if use_cache:
+            self.query_cache.put(query, dataframe)
+
+        return dataframe
     
     def gbq_write(
         self,
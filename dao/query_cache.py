@@ -0,0 +1,159 @@
+from pandas import DataFrame as df, read_parquet
+from datetime import date
+from time import time as t
+import hashlib
+import os
+import re
+import threading
+
+# Defaults, can be overridden per host
+QUERY_CACHE_DIR = os.getenv("QUERY_CACHE_DIR", ".cache/queries")
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", 6 * 60 * 60))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+class QueryResultCache():
+    def __init__(
+        self,
+        cache_dir : str = QUERY_CACHE_DIR,
+        ttl_seconds : int = QUERY_CACHE_TTL_SECONDS,
+        max_bytes : int = QUERY_CACHE_MAX_BYTES,
+        *args, **kwargs
+    ) -> None:
+        """
+            Usage:
+            To cache BigQuery results on local disk, keyed by normalized SQL text and date.
+            Entries expire after `ttl_seconds`, and least recently used entries are evicted above `max_bytes`.
+
+            Arguments:
+            . cache_dir -> directory of cached results
+            . ttl_seconds -> time to live of each result, in seconds
+            . max_bytes -> maximum total size of cached results, in bytes
+        """
+
+        super(QueryResultCache, self).__init__()
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_query(
+        query : str,
+        *args, **kwargs
+    ) -> str:
+        """
+            Usage:
+            To normalize SQL text, so formatting differences share the same cache entry.
+            Comments are removed and whitespaces are collapsed, literals are kept as is.
+
+            Arguments:
+            . query -> SQL query
+        """
+
+        query = re.sub(r"--[^\n]*", " ", query)
+        query = re.sub(r"/\*.*?\*/", " ", query, flags=re.DOTALL)
+        return re.sub(r"\s+", " ", query).strip().rstrip(";").strip()
+
+    def get_key(
+        self,
+        query : str,
+        snapshot_date : date = None,
+        *args, **kwargs
+    ) -> str:
+        """
+            Usage:
+            To get cache key of a query on a date.
+
+            Arguments:
+            . query -> SQL query
+            . snapshot_date -> date of the result, default to today
+        """
+
+        snapshot_date = snapshot_date or date.today()
+        text = "{}\n{}".format(snapshot_date.isoformat(), self.normalize_query(query))
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(
+        self,
+        query : str,
+        *args, **kwargs
+    ) -> df:
+        """
+            Usage:
+            To get cached result of a query, or None if there is no fresh result.
+
+            Arguments:
+            . query -> SQL query
+        """
+
+        path = os.path.join(self.cache_dir, self.get_key(query) + ".parquet")
+
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+
+            if t() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+
+            # Mark as recently used, creation time is kept in modification time
+            os.utime(path, (t(), os.path.getmtime(path)))
+            return read_parquet(path)
+
+    def put(
+        self,
+        query : str,
+        dataframe : df,
+        *args, **kwargs
+    ) -> None:
+        """
+            Usage:
+            To cache result of a query, then evict entries above the size limit.
+
+            Arguments:
+            . query -> SQL query
+            . dataframe -> result of the query
+        """
+
+        path = os.path.join(self.cache_dir, self.get_key(query) + ".parquet")
+
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            dataframe.to_parquet(path + ".tmp", index=False)
+            os.replace(path + ".tmp", path)
+            self.evict()
+
+    def evict(
+        self,
+        *args, **kwargs
+    ) -> None:
+        """
+            Usage:
+            To remove expired entries, then least recently used entries until total size is within `max_bytes`.
+
+            Arguments:
+            . None
+        """
+
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".parquet"):
+                continue
+
+            path = os.path.join(self.cache_dir, file_name)
+            stat = os.stat(path)
+            if t() - stat.st_mtime > self.ttl_seconds:
+                os.remove(path)
+            else:
+                entries.append((stat.st_atime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+
+            os.remove(path)
+            total_bytes -= size
+
+# Shared by all BigQuery objects within a process
+query_cache = QueryResultCache()
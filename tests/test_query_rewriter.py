@@ -0,0 +1,58 @@
+import sqlite3
+import pytest
+from commons.sqlite.query_rewriter import rewrite_composite_key_lookup
+
+SUBSTITUTION_QUERY: str = """
+select produk_substitusi
+from substitusi_produk
+where {key} {operator} (
+    select {selected_key}
+    from detail_mitra
+    inner join rekomendasi_produk on rekomendasi_produk.mitra_id = detail_mitra.mitra_id
+    where detail_mitra.mitra_id = 1
+)
+"""
+
+@pytest.fixture
+def connection() -> sqlite3.Connection:
+    connection: sqlite3.Connection = sqlite3.connect(":memory:")
+    connection.executescript("""
+        create table detail_mitra (mitra_id integer, region_mitra text, cluster text);
+        create table rekomendasi_produk (mitra_id integer, nama_produk text);
+        create table substitusi_produk (cluster text, region text, produk_awal text, produk_substitusi text);
+        create index idx_substitusi_produk_region_produk_awal on substitusi_produk (region, produk_awal);
+
+        insert into detail_mitra values (1, 'jabar', 'c1');
+        insert into rekomendasi_produk values (1, 'produk a'), (1, 'produk b');
+        insert into substitusi_produk values ('c1', 'jabar', 'produk a', 'produk x'), ('c1', 'jatim', 'produk a', 'produk y'), ('c1', 'jabar', 'produk c', 'produk z');
+    """)
+    yield connection
+    connection.close()
+
+@pytest.mark.parametrize("operator", ["in", "not in"])
+def test_two_part_key_is_rewritten(connection: sqlite3.Connection, operator: str):
+    query: str = SUBSTITUTION_QUERY.format(
+        key="region || '_' || produk_awal",
+        operator=operator,
+        selected_key="detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk"
+    )
+    rewritten_query: str = rewrite_composite_key_lookup(query)
+
+    assert "(region, produk_awal) {} (select detail_mitra.region_mitra, rekomendasi_produk.nama_produk".format(operator) in rewritten_query
+    assert sorted(connection.execute(rewritten_query).fetchall()) == sorted(connection.execute(query).fetchall())
+
+    query_plan: str = " ".join(row[-1] for row in connection.execute("explain query plan " + rewritten_query))
+    if operator == "in":
+        assert "USING INDEX idx_substitusi_produk_region_produk_awal" in query_plan
+
+@pytest.mark.parametrize("key, selected_key", [
+    ("cluster || '_' || region || '_' || produk_awal", "detail_mitra.cluster || '_' || detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk"),
+    ("region || '_' || produk_awal", "detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk || '_' || detail_mitra.cluster"),
+    ("cluster || region || '_' || produk_awal", "detail_mitra.cluster || detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk"),
+    ("region || '_' || produk_awal", "detail_mitra.region_mitra || '_' || rekomendasi_produk.nama_produk || detail_mitra.cluster")
+])
+def test_longer_concatenation_is_unchanged(connection: sqlite3.Connection, key: str, selected_key: str):
+    query: str = SUBSTITUTION_QUERY.format(key=key, operator="in", selected_key=selected_key)
+
+    assert rewrite_composite_key_lookup(query) == query
+    connection.execute(query).fetchall()